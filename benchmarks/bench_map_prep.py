@@ -0,0 +1,131 @@
+"""
+Benchmark: map sub-tab preparation (hover fields + categories) at 10k and 100k points.
+
+Compares charagah_pipeline's derived-metrics + map preparation with the previous row-wise
+DataFrame.apply implementation, and checks both produce the same
+categories and the same hover labels.
+
+    python benchmarks/bench_map_prep.py [--sizes 10000 100000]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from charagah_pipeline import (  # noqa: E402
+    COLUMN_RENAME_MAP, HOVER_COLUMNS, HOVER_TEMPLATE, MAP_MODES, add_derived_metrics, parse_created_at,
+    parse_gps_columns, prepare_map_data,
+)
+from synthetic import synthetic_sheet  # noqa: E402
+
+
+def synthetic_inspections(n: int, seed: int = 0) -> pd.DataFrame:
+    """Generated sheet rows (see synthetic.py), renamed, with created_at and GPS parsed; metrics stay raw strings."""
+    df = synthetic_sheet(n, seed=seed).rename(columns=COLUMN_RENAME_MAP)
+    df["created_at"] = parse_created_at(df["created_at"])
+    df, _ = parse_gps_columns(df)
+    return df
+
+
+def legacy_prepare(df: pd.DataFrame) -> pd.DataFrame:
+    """The map sub-tab's original row-wise implementation (all four modes)."""
+    dfm = df.dropna(subset=["latitude", "longitude"]).copy()
+    dfm["plot_area"] = pd.to_numeric(dfm.get("plot_area", 0), errors="coerce").fillna(0)
+    dfm["area_actual_cultivated"] = pd.to_numeric(dfm.get("area_actual_cultivated", 0), errors="coerce").fillna(0)
+    dfm["crop_quality"] = pd.to_numeric(dfm.get("crop_quality", 0), errors="coerce").fillna(0)
+    dfm["area_%"] = (dfm["area_actual_cultivated"] / dfm["plot_area"] * 100).replace([np.inf, -np.inf], np.nan).fillna(0)
+    dfm["production_%"] = (dfm["area_%"] * (dfm["crop_quality"] / 5)).fillna(0)
+
+    def make_hover_text(row):
+        parts = [f"<b>📍 Block:</b> {row['block']}", f"<b>Village:</b> {row['village']}"]
+        if row.get("officer_name"):
+            parts.append(f"<b>Officer:</b> {row['officer_name']} ({row.get('officer_designation','')})")
+        parts.append(f"<b>Plot Area:</b> {row['plot_area']:.2f} ha")
+        parts.append(f"<b>Area Cultivated:</b> {row['area_actual_cultivated']:.2f} ha")
+        parts.append(f"<b>Area %:</b> {row['area_%']:.1f}%")
+        parts.append(f"<b>Quality:</b> {row['crop_quality']:.1f}")
+        parts.append(f"<b>Production %:</b> {row['production_%']:.1f}%")
+        if row.get("created_at"):
+            parts.append(f"<b>Date:</b> {str(row['created_at']).split(' ')[0]}")
+        return "<br>".join(parts)
+
+    def classify_status(row):
+        d = str(row.get("officer_designation", "")).upper()
+        if not d or d == "NAN":
+            return "Not Done"
+        elif "BDO" in d:
+            return "BDO"
+        elif "CVO" in d:
+            return "CVO"
+        elif "सचिव" in d or "SEC" in d:
+            return "सचिव"
+        return "Other"
+
+    def classify_area(row):
+        v = row["area_%"]
+        return "< 50%" if v < 50 else "50–80%" if v < 80 else "> 80%"
+
+    def classify_quality(row):
+        q = row["crop_quality"]
+        return "<= 2" if q <= 2 else "<= 4" if q <= 4 else "> 4"
+
+    def classify_production(row):
+        p = row["production_%"]
+        return "< 50%" if p < 50 else "< 80%" if p < 80 else "> 80%"
+
+    dfm["hover_text"] = dfm.apply(make_hover_text, axis=1)
+    dfm["category_status"] = dfm.apply(classify_status, axis=1)
+    dfm["category_area"] = dfm.apply(classify_area, axis=1)
+    dfm["category_quality"] = dfm.apply(classify_quality, axis=1)
+    dfm["category_production"] = dfm.apply(classify_production, axis=1)
+    return dfm
+
+
+def render_hover(dfm: pd.DataFrame) -> pd.Series:
+    """Expand HOVER_TEMPLATE in Python the way plotly.js does (for comparing with the old hover_text)."""
+    template = re.sub(r"%\{customdata\[(\d+)\](?::([^}]+))?\}",
+                      lambda m: "{%s%s}" % (m.group(1), ":" + m.group(2) if m.group(2) else ""),
+                      HOVER_TEMPLATE.replace("<extra></extra>", ""))
+    return pd.Series([template.format(*row) for row in dfm[HOVER_COLUMNS].itertuples(index=False)], index=dfm.index)
+
+
+def timed(fn, *args, repeat=3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--skip-legacy", action="store_true", help="only time the vectorized path")
+    args = parser.parse_args()
+
+    columns = [m["column"] for m in MAP_MODES.values()]
+    print(f"{'points':>10}  {'vectorized':>12}  {'row-wise':>12}  {'speedup':>8}")
+    for n in args.sizes:
+        df = synthetic_inspections(n)
+        t_new, new = timed(lambda d: prepare_map_data(add_derived_metrics(d)), df)
+        if args.skip_legacy:
+            print(f"{n:>10,}  {t_new * 1000:>10.1f}ms  {'-':>12}  {'-':>8}")
+            continue
+        t_old, old = timed(legacy_prepare, df, repeat=1)
+        pd.testing.assert_frame_equal(new[columns], old[columns], check_dtype=False)
+        # The old labels read "Date: NaT" for unparseable Created At values; the new ones leave the date out
+        dated = new[new["created_at"].notna()]
+        sample = dated.sample(min(len(dated), 2000), random_state=0)
+        pd.testing.assert_series_equal(render_hover(sample), old.loc[sample.index, "hover_text"], check_names=False)
+        print(f"{n:>10,}  {t_new * 1000:>10.1f}ms  {t_old * 1000:>10.1f}ms  {t_old / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
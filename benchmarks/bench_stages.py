@@ -0,0 +1,242 @@
+"""
+Benchmark: every ingest / report stage separately, on synthetic sheets of 1k–1M rows.
+
+Each size gets a generated sheet (Hindi headers, text cells) and a matching baseline
+workbook, loaded the way the dashboard loads it. The stages run in pipeline order,
+each on the previous stage's output:
+
+    rename → created_at → schema → gps → dedup → metrics → plot_join
+    → block_aggregation → map_prep → excel_export
+
+Stage times are the best of --repeat runs. Peak memory is measured in a separate
+pass under tracemalloc (numpy/pandas buffers are traced; Arrow's own pool is not),
+so tracing does not distort the times. Results go to a JSON file; --compare
+prints the ratios against an earlier one.
+
+    python benchmarks/bench_stages.py --sizes 1000 10000 --out bench_results.json
+    python benchmarks/bench_stages.py --sizes 1000 10000 --compare bench_results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from charagah_pipeline import (  # noqa: E402
+    COLUMN_RENAME_MAP, MAP_DATA_COLUMNS, SHEET_SCHEMA, PlotJoin, add_derived_metrics, apply_schema,
+    block_report, block_summary, build_rollup, load_baseline, parse_created_at, parse_gps_columns,
+    prepare_baseline, prepare_map_data, remove_duplicates, to_excel_bytes,
+)
+from synthetic import ROWS_PER_PLOT, baseline_workbook_frame, synthetic_baseline, synthetic_sheet  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+# A stage slower than this ratio against --compare is reported as a regression
+REGRESSION_RATIO = 1.25
+
+
+def _rename(s):
+    s["df"] = s["raw"].rename(columns=lambda c: str(c).strip()).rename(columns=COLUMN_RENAME_MAP)
+
+
+def _created_at(s):
+    df = s["df"].copy()
+    df["created_at"] = parse_created_at(df["created_at"])
+    df["created_date"] = df["created_at"].dt.normalize()
+    df["created_time"] = df["created_at"].dt.time
+    s["df"] = df
+
+
+def _schema(s):
+    # created_at is already parsed by the previous stage
+    s["df"], _ = apply_schema(s["df"], {k: v for k, v in SHEET_SCHEMA.items() if k != "created_at"})
+
+
+def _gps(s):
+    s["df"], _ = parse_gps_columns(s["df"])
+
+
+def _dedup(s):
+    s["df"] = remove_duplicates(s["df"])
+
+
+def _metrics(s):
+    s["df"] = add_derived_metrics(s["df"])
+
+
+def _plot_join(s):
+    join = PlotJoin(s["base"])
+    s["plots"] = join.status(join.assign(s["df"]))
+
+
+def _block_aggregation(s):
+    s["blocks"] = block_report(block_summary(build_rollup(s["df"])), s["base"], s["plots"])
+
+
+def _map_prep(s):
+    dfm = prepare_map_data(s["df"])
+    s["map"] = dfm[[c for c in MAP_DATA_COLUMNS if c in dfm.columns]]
+
+
+def _excel_export(s):
+    s["xlsx"] = to_excel_bytes(s["map"], "Map Data")
+
+
+STAGES = [
+    ("rename", _rename),
+    ("created_at", _created_at),
+    ("schema", _schema),
+    ("gps", _gps),
+    ("dedup", _dedup),
+    ("metrics", _metrics),
+    ("plot_join", _plot_join),
+    ("block_aggregation", _block_aggregation),
+    ("map_prep", _map_prep),
+    ("excel_export", _excel_export),
+]
+
+
+def load_dataset(rows: int, work_dir: str, seed: int = 0) -> dict:
+    """Generated sheet + baseline; the baseline round-trips through a workbook like the real one."""
+    df_base = synthetic_baseline(max(50, rows // ROWS_PER_PLOT), seed)
+    raw = synthetic_sheet(rows, df_base, seed)
+    path = os.path.join(work_dir, f"baseline_{rows}.xlsx")
+    baseline_workbook_frame(df_base).to_excel(path, index=False)
+    base, _ = prepare_baseline(load_baseline(path, work_dir))
+    return {"raw": raw, "base": base}
+
+
+def time_stages(data: dict, stages: list) -> tuple:
+    """One pass over the stages: ({stage: seconds}, final state)."""
+    state, times = dict(data), {}
+    for name, fn in stages:
+        t0 = time.perf_counter()
+        fn(state)
+        times[name] = time.perf_counter() - t0
+    return times, state
+
+
+def peak_memory(data: dict, stages: list) -> dict:
+    """One traced pass: {stage: peak bytes allocated above what was live when it started}."""
+    state, peaks = dict(data), {}
+    tracemalloc.start()
+    try:
+        for name, fn in stages:
+            tracemalloc.reset_peak()
+            live, _ = tracemalloc.get_traced_memory()
+            fn(state)
+            peaks[name] = tracemalloc.get_traced_memory()[1] - live
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def run_size(rows: int, stages: list, repeat: int, memory: bool, work_dir: str) -> dict:
+    data = load_dataset(rows, work_dir)
+    best = {}
+    for _ in range(repeat):
+        times, state = time_stages(data, stages)
+        for name, t in times.items():
+            best[name] = min(best.get(name, float("inf")), t)
+    peaks = peak_memory(data, stages) if memory else {}
+    result = {
+        "rows": rows,
+        "baseline_plots": len(data["base"]),
+        "rows_after_dedup": len(state["df"]),
+        "stages": {
+            name: {"seconds": round(best[name], 4), "peak_mb": round(peaks[name] / 1e6, 1) if name in peaks else None}
+            for name, _ in stages
+        },
+    }
+    result["total_seconds"] = round(sum(best.values()), 4)
+    return result
+
+
+def environment() -> dict:
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": pa.__version__,
+    }
+
+
+def print_results(results: dict) -> None:
+    for size, res in results.items():
+        print(f"\n{int(size):,} rows ({res['rows_after_dedup']:,} after dedup, {res['baseline_plots']:,} plots)")
+        print(f"  {'stage':<18} {'seconds':>10} {'peak MB':>10}")
+        for name, st in res["stages"].items():
+            peak = "-" if st["peak_mb"] is None else f"{st['peak_mb']:.1f}"
+            print(f"  {name:<18} {st['seconds']:>10.4f} {peak:>10}")
+        print(f"  {'total':<18} {res['total_seconds']:>10.4f}")
+
+
+def compare(results: dict, previous: dict, threshold: float = REGRESSION_RATIO) -> list:
+    """Print new/old time ratios per size and stage; returns the (size, stage, ratio) regressions."""
+    regressions = []
+    for size, res in results.items():
+        old = previous.get("results", {}).get(size)
+        if old is None:
+            continue
+        print(f"\n{int(size):,} rows vs {previous.get('environment', {}).get('date', 'previous run')}")
+        print(f"  {'stage':<18} {'old s':>10} {'new s':>10} {'ratio':>7} {'old MB':>8} {'new MB':>8}")
+        for name, st in res["stages"].items():
+            prev = old["stages"].get(name)
+            if prev is None:
+                continue
+            ratio = st["seconds"] / prev["seconds"] if prev["seconds"] else float("nan")
+            flag = "  ⚠️" if ratio > threshold else ""
+            mb = [("-" if v is None else f"{v:.1f}") for v in (prev.get("peak_mb"), st["peak_mb"])]
+            print(f"  {name:<18} {prev['seconds']:>10.4f} {st['seconds']:>10.4f} {ratio:>6.2f}x {mb[0]:>8} {mb[1]:>8}{flag}")
+            if ratio > threshold:
+                regressions.append((size, name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=1, help="timed passes per size (best is kept)")
+    parser.add_argument("--until", choices=[name for name, _ in STAGES],
+                        help="stop after this stage (e.g. map_prep to leave out the Excel export at 1M rows)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--out", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_RATIO, help="slowdown ratio reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 on a regression")
+    args = parser.parse_args()
+
+    stages = STAGES
+    if args.until:
+        stages = STAGES[:[name for name, _ in STAGES].index(args.until) + 1]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for rows in args.sizes:
+            results[str(rows)] = run_size(rows, stages, args.repeat, not args.no_memory, work_dir)
+    print_results(results)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, ensure_ascii=False, indent=2)
+    print(f"\nwrote {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Synthetic submissions for benchmarks: raw Google Sheet rows (the Hindi headers of
+COLUMN_RENAME_MAP, every cell text like the Sheets API returns) and a matching
+baseline workbook, at any size.
+
+Inspections are drawn from the baseline plots, so the plot join, the location
+check and same-day de-duplication all see realistic hit rates. A small share of
+values is deliberately messy: NBSP-padded names, Devanagari gata digits,
+Created At in another layout, missing / out-of-district GPS fixes.
+
+    python benchmarks/synthetic.py --rows 100000 --out bench_data
+    python charagah_pipeline.py report --input bench_data/sheet_100000.csv \\
+        --baseline bench_data/baseline_100000.xlsx
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from charagah_pipeline import BASELINE_RENAME_MAP, COLUMN_RENAME_MAP, CREATED_AT_FORMAT  # noqa: E402
+
+# Blocks of the district with their tehsil
+BLOCK_TEHSIL = {
+    "कांट": "सदर", "खुटार": "पुवायां", "खुदागंज": "तिलहर", "जलालाबाद": "जलालाबाद",
+    "तिलहर": "तिलहर", "ददरौल": "सदर", "निगोही": "तिलहर", "पुवायां": "पुवायां",
+    "बण्डा": "पुवायां", "भावलखेड़ा": "सदर", "मदनापुर": "सदर", "मिर्जापुर": "कलान",
+}
+_VILLAGE_PREFIXES = ["राम", "मान", "सिं", "बर", "खे", "नग", "पिप", "कल", "हर", "कुं", "तौ", "भुड़"]
+_VILLAGE_SUFFIXES = ["पुर", "गंज", "खेड़ा", "नगर", "रिया", "पारा", "गांव", "ढेर", "नी", "दैया"]
+OFFICERS = ["राम कुमार", "सुरेश चंद्र", "अनिल यादव", "Suresh", "Pooja Verma", "मोहित सिंह", ""]
+DESIGNATIONS = ["BDO", "CVO", "ग्राम सचिव", "Secretary", "ADO", "सचिव", ""]
+# Inspection window and the share of sheet rows per baseline plot
+START = pd.Timestamp("2025-10-01")
+DAYS = 60
+ROWS_PER_PLOT = 20
+_DEVANAGARI = str.maketrans("0123456789", "०१२३४५६७८९")
+
+
+def _village_names(n: int) -> np.ndarray:
+    base = [p + s for p in _VILLAGE_PREFIXES for s in _VILLAGE_SUFFIXES]
+    names = [base[i % len(base)] + (f" {i // len(base)}" if i >= len(base) else "") for i in range(n)]
+    return np.array(names, dtype=object)
+
+
+def _gps_text(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    return np.char.add(np.char.add(np.char.mod("%.6f", lat), ","), np.char.mod("%.6f", lon)).astype(object)
+
+
+def synthetic_baseline(n_plots: int, seed: int = 0) -> pd.DataFrame:
+    """Baseline plots with the workbook's Hindi headers (numbers as numbers, like read_excel gives them)."""
+    rng = np.random.default_rng(seed)
+    n_villages = max(len(BLOCK_TEHSIL), n_plots // 3)
+    blocks = np.array(list(BLOCK_TEHSIL), dtype=object)
+    village_block = blocks[np.arange(n_villages) % len(blocks)]
+    village_lat = rng.uniform(27.45, 28.35, n_villages)
+    village_lon = rng.uniform(79.45, 80.25, n_villages)
+
+    village = np.sort(rng.integers(0, n_villages, n_plots))
+    # Gata numbers unique within a village; a few plots span several gatas ("46/47/48")
+    rank = np.arange(n_plots) - np.searchsorted(village, village)
+    gata = (rank * 7 + rng.integers(1, 7, n_plots)).astype(str).astype(object)
+    multi = rng.random(n_plots) < 0.05
+    gata[multi] = gata[multi] + "/" + (rank[multi] * 7 + 7).astype(str)
+
+    area = rng.uniform(0.1, 3.0, n_plots).round(3)
+    lat = village_lat[village] + rng.normal(0, 0.004, n_plots)
+    lon = village_lon[village] + rng.normal(0, 0.004, n_plots)
+    gps = np.where(rng.random(n_plots) < 0.8, _gps_text(lat, lon), None)
+    out = pd.DataFrame({
+        "गांव": _village_names(n_villages)[village],
+        "विकास खंड": village_block[village],
+        "तहसील": pd.Series(village_block[village]).map(BLOCK_TEHSIL).to_numpy(),
+        "भूमि गाटा संख्या": gata,
+        "क्षेत्रफल ( हे)": area,
+        "बुवाई की गई भूमि": np.where(rng.random(n_plots) < 0.7, area, (area * rng.random(n_plots)).round(3)),
+        "GPS Location": gps,
+        "_lat": lat,
+        "_lon": lon,
+    })
+    return out
+
+
+def baseline_workbook_frame(df_base: pd.DataFrame) -> pd.DataFrame:
+    """The baseline as it is stored in the workbook (header columns only)."""
+    return df_base[list(BASELINE_RENAME_MAP)]
+
+
+def synthetic_sheet(n: int, df_base: pd.DataFrame = None, seed: int = 0) -> pd.DataFrame:
+    """`n` raw sheet rows (all text) with the sheet's Hindi headers, inspecting plots of `df_base`."""
+    if df_base is None:
+        df_base = synthetic_baseline(max(50, n // ROWS_PER_PLOT), seed)
+    rng = np.random.default_rng(seed + 1)
+    plot = rng.integers(0, len(df_base), n)
+    base = df_base.iloc[plot].reset_index(drop=True)
+
+    def text(values):
+        return np.asarray(values, dtype=object)
+
+    # Created At: minute resolution, formatted once per distinct minute
+    minutes = rng.integers(0, DAYS * 24 * 60, n)
+    uniq, inverse = np.unique(minutes, return_inverse=True)
+    stamps = START + pd.to_timedelta(uniq, unit="min")
+    created = text(stamps.strftime(CREATED_AT_FORMAT))[inverse]
+    other = rng.random(n) < 0.01  # another layout → parsed by inference
+    created[other] = text(stamps.strftime("%d/%m/%Y %H:%M"))[inverse[other]]
+    created[rng.random(n) < 0.002] = ""
+
+    village = text(base["गांव"])
+    padded = rng.random(n) < 0.03
+    village[padded] = "\u00a0" + village[padded]  # leading NBSP, as in the real baseline
+    gata = text(base["भूमि गाटा संख्या"])
+    hindi = rng.random(n) < 0.02
+    gata[hindi] = [g.translate(_DEVANAGARI) for g in gata[hindi]]
+
+    area = base["क्षेत्रफल ( हे)"].to_numpy()
+    cultivated = np.floor(area * rng.uniform(0, 1, n) * 100) / 100  # never above the plot area
+    quality = rng.integers(1, 6, n).astype(str).astype(object)
+    quality[rng.random(n) < 0.01] = ""
+
+    # Inspection fix within ~200 m of the plot; some missing or (0, 0)
+    lat = base["_lat"].to_numpy() + rng.normal(0, 0.0015, n)
+    lon = base["_lon"].to_numpy() + rng.normal(0, 0.0015, n)
+    gps = _gps_text(lat, lon)
+    fix = rng.random(n)
+    gps[fix < 0.01] = ""
+    gps[(fix >= 0.01) & (fix < 0.015)] = "0.000000,0.000000"
+
+    photo_id = np.char.mod("%07d", np.arange(n)).astype(object)
+    day = text(stamps.strftime("%Y%m%d"))[inverse]
+    sheet = pd.DataFrame({
+        "Created At": created,
+        "तहसील": text(base["तहसील"]),
+        "विकास खंड": text(base["विकास खंड"]),
+        "गांव": village,
+        "भूमि गाटा संख्या": gata,
+        "क्षेत्रफल ( हे)": text(base["क्षेत्रफल ( हे)"].astype(str)),
+        "बुवाई की गई भूमि": text(base["बुवाई की गई भूमि"].astype(str)),
+        "GPS Location": text(base["GPS Location"].fillna("")),
+        "अधिकारी का नाम": rng.choice(text(OFFICERS), n),
+        "अधिकारी पद": rng.choice(text(DESIGNATIONS), n),
+        "अभिकारी मोबाइल नंबर": np.char.mod("9%09d", rng.integers(0, 10**9, n)).astype(object),
+        "गोशाला का नाम": np.char.add("गोशाला ", rng.integers(1, 200, n).astype(str)).astype(object),
+        "कुल बुवाई पाई गई क्षेत्रफल( हे में)": np.char.mod("%.2f", cultivated).astype(object),
+        "फसल की गुणवत्ता": quality,
+        "सेल्फी ले": "https://storage.example.com/IMG-" + day + "_" + photo_id + "s.jpg",
+        "फसल की फोटो": "https://storage.example.com/IMG-" + day + "_" + photo_id + "f.jpg",
+        "Date": text(stamps.strftime("%d/%m/%Y"))[inverse],
+        "Time": text(stamps.strftime("%H:%M"))[inverse],
+        "GPS Location inspection": gps,
+    })
+    return sheet[list(COLUMN_RENAME_MAP)]
+
+
+def write_dataset(rows: int, out_dir: str, seed: int = 0) -> tuple:
+    """Write sheet_<rows>.csv and baseline_<rows>.xlsx; returns their paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    df_base = synthetic_baseline(max(50, rows // ROWS_PER_PLOT), seed)
+    sheet_path = os.path.join(out_dir, f"sheet_{rows}.csv")
+    base_path = os.path.join(out_dir, f"baseline_{rows}.xlsx")
+    synthetic_sheet(rows, df_base, seed).to_csv(sheet_path, index=False)
+    baseline_workbook_frame(df_base).to_excel(base_path, index=False)
+    return sheet_path, base_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--out", default="bench_data", help="output directory")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for rows in args.rows:
+        for path in write_dataset(rows, args.out, args.seed):
+            print(path)
+
+
+if __name__ == "__main__":
+    main()
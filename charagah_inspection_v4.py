@@ -11,21 +11,35 @@ Features:
 
 import os
 import re
+import math
+import json
+import time
+import hashlib
+import threading
 from io import BytesIO
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
 from datetime import datetime, date
 
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import folium
-from streamlit_folium import st_folium
 
-import requests
-from PIL import Image
-import gspread
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
+# Heavy libraries (plotly, PIL, requests, the Google API client) are imported where
+# they are first needed, through timed_import(), so the first view renders without them
+from startup_profile import IMPORT_TIMES, RunTimer, cold_run, timed_import
+
+run_timer = RunTimer()
+
+with timed_import("charagah_pipeline"):  # pandas, numpy, pyarrow
+    import pandas as pd
+    import numpy as np
+    from charagah_pipeline import (
+        EXPORT_FORMATS, LOCATION_MATCH_METERS, MAP_BIN_PIXELS, MAP_DATA_COLUMNS, MAP_MARKER_ZOOM, MAP_MAX_MARKERS, MAP_MODES,
+        XLSX_MIME, DateIndex, PlotIndex, PlotJoin, block_report, block_summary, build_rollup, clean_inspections, coarsen_rollup,
+        degrees_per_pixel, export_tables, frame_fingerprint, load_baseline, load_google_sheet, map_levels, match_to_plots,
+        prepare_baseline,
+        prepare_map_data, table_bytes, to_excel_bytes,
+    )
 
 
 # --- Hide all Streamlit UI and Cloud branding ---
@@ -93,6 +107,28 @@ GOOGLE_SHEET_URL = "https://docs.google.com/spreadsheets/d/1K0KxYzI7td53UmLu_5Ze
 GOOGLE_DRIVE_FOLDER_ID = "1SO-p_yU7ARjEsMIcEqu7m2T8Dh2Bt4BJ"
 BASELINE_PATH = "baseline_static_data.xlsx"
 
+# Local cache for data pulled from Google (sheet rows, photos, ...)
+CACHE_DIR = ".dashboard_cache"
+# "incremental" → keep a local copy of seen rows and fetch only appended ones; "full" → get_all_values() every time
+SHEET_SYNC_MODE = "incremental"
+# Background refresh interval (seconds) — viewers are served the last good snapshot meanwhile
+SHEET_REFRESH_SECONDS = 300
+DRIVE_REFRESH_SECONDS = 900
+# Photo cache: disk tier (survives restarts) + small in-memory tier in front of it.
+# The disk tier lives under static/ next to this script, which is what Streamlit serves
+# (server.enableStaticServing) whatever directory the app is started from.
+IMAGE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "media")
+MEDIA_URL_PREFIX = "app/static/media"
+IMAGE_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+IMAGE_MEMORY_MAX_BYTES = 64 * 1024 * 1024
+# Longest side (px) of the derived images: grid thumbnails and the mid-size preview
+IMAGE_VARIANT_SIZES = {"thumb": 320, "preview": 1280}
+# Concurrent photo downloads: worker threads overall, and simultaneous requests per host
+PHOTO_FETCH_WORKERS = 16
+PHOTO_FETCH_PER_HOST = 8
+# Photos per gallery page (only the visible page is fetched and embedded)
+PHOTOS_PER_PAGE = 24
+
 # ----------------------------
 # LOAD CREDENTIALS
 # ----------------------------
@@ -278,71 +314,148 @@ a:active {
 # ----------------------------
 # HELPER FUNCTIONS
 # ----------------------------
-@st.cache_data
-def load_google_sheet(sheet_url: str, _creds_json: dict) -> pd.DataFrame:
-    scopes = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive.readonly"]
-    credentials = Credentials.from_service_account_info(_creds_json, scopes=scopes)
-    gc = gspread.authorize(credentials)
-    sh = gc.open_by_url(sheet_url)
-    ws = sh.get_worksheet(0)
-    rows = ws.get_all_values()
-    if not rows:
-        return pd.DataFrame()
-    header = rows[0]
-    data = rows[1:]
-    df = pd.DataFrame(data, columns=header)
-    df.columns = df.columns.str.strip()
-
-
-    return df
-
+class Snapshot:
+    """
+    Stale-while-revalidate holder for one slow loader (Sheet / Drive).
+
+    get() always returns the last good value immediately. Once it is older than
+    `ttl` seconds a single background thread reloads it; failures keep the old
+    value and are exposed via `last_error`. Only the very first load blocks, and
+    it is single-flight: concurrent first callers wait for one load instead of
+    each running their own.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.value = None
+        self.loaded_at = None
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._first_load = threading.Lock()
+        self._refreshing = False
+
+    def _refresh(self, loader):
+        try:
+            value = loader()
+            with self._lock:
+                self.value, self.loaded_at, self.last_error = value, time.time(), None
+        except Exception as e:
+            with self._lock:
+                self.last_error = e
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def get(self, loader):
+        with self._lock:
+            if self.value is not None:
+                if time.time() - self.loaded_at > self.ttl and not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh, args=(loader,), daemon=True).start()
+                return self.value
+        # Nothing to serve yet → one caller loads in the foreground, the others wait for it.
+        # Errors propagate to the loading caller; the next waiter then tries itself.
+        with self._first_load:
+            with self._lock:
+                if self.value is not None:
+                    return self.value
+            value = loader()
+            with self._lock:
+                self.value, self.loaded_at, self.last_error = value, time.time(), None
+            return value
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.loaded_at if self.loaded_at else 0.0
+
+
+@st.cache_resource
+def get_snapshot(name: str, ttl: float) -> Snapshot:
+    """One shared Snapshot per data source, across all sessions of this process."""
+    return Snapshot(ttl)
+
+
+def format_age(seconds: float) -> str:
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+def plotly_express():
+    """plotly.express, imported when the first chart is drawn rather than at startup."""
+    with timed_import("plotly.express"):
+        import plotly.express as px
+    return px
+
+
+# Drive API limits: 1000 files per list page, 100 calls per batch request
+DRIVE_PAGE_SIZE = 1000
+DRIVE_BATCH_SIZE = 100
+
+
+def list_drive_images(service, folder_id: str) -> list:
+    """List every image in the folder, following nextPageToken until exhausted."""
+    query = f"'{folder_id}' in parents and mimeType contains 'image/' and trashed = false"
+    files, page_token = [], None
+    while True:
+        resp = service.files().list(
+            q=query,
+            pageSize=DRIVE_PAGE_SIZE,
+            pageToken=page_token,
+            fields="nextPageToken, files(id, name, permissions(type, role))",
+        ).execute()
+        files.extend(resp.get("files", []))
+        page_token = resp.get("nextPageToken")
+        if not page_token:
+            return files
+
+
+def is_public(file: dict) -> bool:
+    return any(p.get("type") == "anyone" for p in file.get("permissions", []))
+
+
+def grant_public_read(service, file_ids: list) -> None:
+    """Make files readable by anyone with the link, DRIVE_BATCH_SIZE calls per HTTP round trip."""
+    def ignore_errors(request_id, response, exception):
+        pass  # a failed grant only means that photo may not render
+
+    for i in range(0, len(file_ids), DRIVE_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=ignore_errors)
+        for file_id in file_ids[i:i + DRIVE_BATCH_SIZE]:
+            batch.add(service.permissions().create(
+                fileId=file_id,
+                body={"role": "reader", "type": "anyone"},
+                fields="id"
+            ))
+        batch.execute()
 
-from googleapiclient.discovery import build
-from google.oauth2.service_account import Credentials
 
-@st.cache_data
 def fetch_drive_photos(folder_id: str, _creds_json: dict) -> pd.DataFrame:
     """Fetch photos from Google Drive and generate valid public URLs."""
+    with timed_import("googleapiclient.discovery"):
+        from googleapiclient.discovery import build
+        from google.oauth2.service_account import Credentials
+
     scopes = ["https://www.googleapis.com/auth/drive"]
     credentials = Credentials.from_service_account_info(_creds_json, scopes=scopes)
     service = build("drive", "v3", credentials=credentials)
 
-    query = f"'{folder_id}' in parents and mimeType contains 'image/' and trashed = false"
-    resp = service.files().list(q=query, fields="files(id, name, webViewLink, webContentLink)").execute()
-    files = resp.get("files", [])
-
-    drive_photos = []
-    for f in files:
-        file_id = f["id"]
-        file_name = f["name"]
-
-        # ✅ Ensure sharing permission "anyoneWithLink"
-        try:
-            service.permissions().create(
-                fileId=file_id,
-                body={"role": "reader", "type": "anyone"},
-                fields="id"
-            ).execute()
-        except Exception:
-            pass  # Ignore if already public
-
-        # ✅ Generate real public link (guaranteed accessible)
-        public_url = f"https://drive.google.com/uc?id={file_id}"
-
-        drive_photos.append({
-            "file_name": file_name,
-            "public_url": public_url
-        })
+    files = list_drive_images(service, folder_id)
 
-    return pd.DataFrame(drive_photos)
+    # ✅ Ensure sharing permission "anyoneWithLink" — only for files not already public
+    grant_public_read(service, [f["id"] for f in files if not is_public(f)])
 
+    # ✅ Generate real public link (guaranteed accessible)
+    drive_photos = [
+        {"file_name": f["name"], "public_url": f"https://drive.google.com/uc?id={f['id']}"}
+        for f in files
+    ]
 
+    return pd.DataFrame(drive_photos, columns=["file_name", "public_url"])
 
 
-import re
-import requests
-from io import BytesIO
-from PIL import Image
 
 # --- Convert Drive URLs to direct-download form ---
 def convert_drive_url(url: str):
@@ -368,36 +481,259 @@ def extract_filename_from_url(url: str):
     return match.group(1) if match else None
 
 
-# --- Robust downloader for any image URL ---
-@st.cache_data(show_spinner=False)
-def get_image_bytes(url: str):
-    """Download image bytes safely, following redirects and checking MIME."""
-    if not isinstance(url, str) or not url:
-        return None
-    try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        resp = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
-        # Only accept real image responses
-        if resp.status_code == 200 and "image" in resp.headers.get("Content-Type", ""):
-            return resp.content
-        return None
-    except Exception:
-        return None
-
-
-def parse_gps_column(df, col):
-    """Parse GPS column formatted like '27.8921216,79.9309824'."""
-    def parse_val(v):
+# --- Persistent image store (disk LRU + memory LRU) ---
+IMAGE_MIME_EXT = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp", "image/gif": ".gif"}
+
+
+def sniff_image_mime(data: bytes) -> str:
+    """Detect the image type from its magic bytes (defaults to JPEG)."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:4] == b"GIF8":
+        return "image/gif"
+    return "image/jpeg"
+
+
+def image_key(url: str) -> str:
+    """Cache key for a photo: its Drive file id, or a hash of the URL for anything else."""
+    m = re.search(r"(?:id=|/d/)([a-zA-Z0-9_-]{15,})", url)
+    if m:
+        return m.group(1)
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+
+
+class ImageStore:
+    """
+    Content store for photo bytes with a byte budget on both tiers.
+
+    Disk files live in `root` as <key><ext>; their mtime records last use so the
+    LRU order survives restarts. When a tier exceeds its budget the least
+    recently used entries are evicted. Safe to share between threads.
+    """
+
+    def __init__(self, root: str, max_bytes: int, memory_max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.memory_max_bytes = memory_max_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> bytes, most recent last
+        self._memory_bytes = 0
+        self._disk = OrderedDict()    # key -> (path, size), most recent last
+        self._disk_bytes = 0
+
+        os.makedirs(root, exist_ok=True)
+        entries = []
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if name.endswith(".tmp") or not os.path.isfile(path):
+                continue
+            info = os.stat(path)
+            entries.append((info.st_mtime, os.path.splitext(name)[0], path, info.st_size))
+        for _, key, path, size in sorted(entries):
+            self._disk[key] = (path, size)
+            self._disk_bytes += size
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.memory_max_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_max_bytes:
+            _, old = self._memory.popitem(last=False)
+            self._memory_bytes -= len(old)
+
+    def get(self, key: str):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+            entry = self._disk.get(key)
+            if entry is None:
+                return None
+            self._disk.move_to_end(key)
+        path = entry[0]
         try:
-            s = str(v).replace("(", "").replace(")", "").replace(" ", "")
-            a, b = s.split(",")
-            return float(a), float(b)
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                if self._disk.pop(key, None):
+                    self._disk_bytes -= entry[1]
+            return None
+        with self._lock:
+            self._remember(key, data)
+        return data
+
+    def locate(self, key: str):
+        """(path, size) of a stored entry without reading it (None if not cached); counts as a use."""
+        with self._lock:
+            entry = self._disk.get(key)
+            if entry is None:
+                return None
+            self._disk.move_to_end(key)
+        try:
+            os.utime(entry[0])
+        except OSError:
+            return None
+        return entry
+
+    def put(self, key: str, data: bytes) -> str:
+        path = os.path.join(self.root, key + IMAGE_MIME_EXT[sniff_image_mime(data)])
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        evicted = []
+        with self._lock:
+            old = self._disk.pop(key, None)
+            if old:
+                self._disk_bytes -= old[1]
+                if old[0] != path:
+                    evicted.append(old[0])
+            self._disk[key] = (path, len(data))
+            self._disk_bytes += len(data)
+            while self._disk_bytes > self.max_bytes and len(self._disk) > 1:
+                old_key, (old_path, size) = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                self._memory_bytes -= len(self._memory.pop(old_key, b""))
+                evicted.append(old_path)
+            self._remember(key, data)
+        for old_path in evicted:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+        return path
+
+
+@st.cache_resource
+def get_image_store() -> ImageStore:
+    return ImageStore(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES, IMAGE_MEMORY_MAX_BYTES)
+
+
+def make_variants(data: bytes, sizes: dict) -> dict:
+    """Downscale an image to each {name: max_side} (decoding it once) and re-encode them as JPEG."""
+    with timed_import("PIL.Image"):
+        from PIL import Image, ImageOps
+
+    img = Image.open(BytesIO(data))
+    # JPEG only: let the decoder produce a 1/2, 1/4 or 1/8 scale image directly
+    largest = max(sizes.values())
+    img.draft("RGB", (largest, largest))
+    img = ImageOps.exif_transpose(img).convert("RGB")  # phone photos carry EXIF rotation
+    variants = {}
+    for name, max_side in sorted(sizes.items(), key=lambda kv: -kv[1]):
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+        out = BytesIO()
+        img.save(out, format="JPEG", quality=80, optimize=True, progressive=True)
+        variants[name] = out.getvalue()
+    return variants
+
+
+def media_url(path: str, size: int) -> str:
+    """URL of a stored file under Streamlit's static route. The `v` query makes Tornado send
+    far-future cache headers; stored files never change in place, so browsers keep them."""
+    return f"{MEDIA_URL_PREFIX}/{os.path.basename(path)}?v={size}"
+
+
+class PhotoFetcher:
+    """
+    Reads photos through the ImageStore and downloads misses over one pooled
+    keep-alive Session. Downloads run on a bounded thread pool with a
+    per-host concurrency cap; fetch_many() returns results in input order.
+    """
+
+    def __init__(self, store: ImageStore, workers: int, per_host: int):
+        with timed_import("requests"):
+            import requests
+
+        self.store = store
+        self.workers = workers
+        self.per_host = per_host
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "Mozilla/5.0"
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._host_slots = {}
+        self._lock = threading.Lock()
+
+    def _slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_slots[host]
+
+    def get(self, url: str):
+        """Return image bytes from the local store, downloading (following redirects, checking MIME) on a miss."""
+        if not isinstance(url, str) or not url:
+            return None
+        key = image_key(url)
+        data = self.store.get(key)
+        if data is not None:
+            return data
+        try:
+            with self._slot(url):
+                resp = self.session.get(url, timeout=10, allow_redirects=True)
+            # Only accept real image responses
+            if resp.status_code == 200 and "image" in resp.headers.get("Content-Type", ""):
+                self.store.put(key, resp.content)
+                return resp.content
+            return None
         except Exception:
-            return np.nan, np.nan
-    lat, lon = zip(*df[col].map(parse_val))
-    df["latitude"] = lat
-    df["longitude"] = lon
-    return df
+            return None
+
+    def media_urls(self, url: str):
+        """
+        Ensure the resized variants of a photo ("thumb" / "preview") are stored and
+        return {variant: media URL}; None if the photo cannot be fetched or decoded.
+        """
+        if not isinstance(url, str) or not url:
+            return None
+        base = image_key(url)
+        found = {name: self.store.locate(f"{base}_{name}") for name in IMAGE_VARIANT_SIZES}
+        missing = {name: IMAGE_VARIANT_SIZES[name] for name, entry in found.items() if entry is None}
+        if missing:
+            original = self.get(url)
+            if original is None:
+                return None
+            try:
+                variants = make_variants(original, missing)
+            except Exception:
+                return None
+            for name, data in variants.items():
+                found[name] = (self.store.put(f"{base}_{name}", data), len(data))
+        return {name: media_url(path, size) for name, (path, size) in found.items()}
+
+    def fetch_many(self, urls: list, fetch=None, progress=None) -> list:
+        """
+        Run `fetch` (default: get) for many photos concurrently; results are in input order.
+        `progress(done, total)` is called from the calling thread.
+        """
+        fetch = fetch or self.get
+        results = [None] * len(urls)
+        if not urls:
+            return results
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(urls))) as pool:
+            futures = {pool.submit(fetch, u): i for i, u in enumerate(urls)}
+            for done, fut in enumerate(as_completed(futures), 1):
+                results[futures[fut]] = fut.result()
+                if progress:
+                    progress(done, len(urls))
+        return results
+
+
+@st.cache_resource
+def get_photo_fetcher() -> PhotoFetcher:
+    return PhotoFetcher(get_image_store(), PHOTO_FETCH_WORKERS, PHOTO_FETCH_PER_HOST)
 
 
 def normalize_quality(val):
@@ -408,35 +744,6 @@ def normalize_quality(val):
     return "not_inspected"
 
 
-    # ==========================================================
-# 🧹 Clean & Deduplicate Google Sheet Data
-# ==========================================================
-
-def remove_duplicates(df_raw):
-    # Ensure datetime
-    if "created_at" in df_raw.columns:
-        df_raw["created_at"] = pd.to_datetime(df_raw["created_at"], errors="coerce")
-
-    # Create a date-only column
-    #df_raw["created_date"] = df_raw["created_at"].dt.date
-
-    # Sort so newest submissions appear first
-    df_raw = df_raw.sort_values(by="created_at", ascending=False)
-
-    # Drop duplicate submissions for the same village in the same block on the same day
-    if {"block", "village"} <= set(df_raw.columns):
-        df_raw = df_raw.drop_duplicates(subset=["block", "village", "created_date"], keep="first")
-    else:
-        # fallback if block not present
-        df_raw = df_raw.drop_duplicates(subset=["village", "created_date"], keep="first")
-
-    # Remove helper column
-    #df_raw = df_raw.drop(columns=["created_date"], errors="ignore")
-
-    # Summary info
-    # st.info(f"✅ Cleaned data: {len(df_raw)} unique (latest) submissions per village per day.")
-
-    return df_raw
 # ----------------------------
 # LOAD GOOGLE SHEET + RENAME
 # ----------------------------
@@ -445,92 +752,176 @@ st.title("🐄 गोशाला चरागाह निरीक्षण Da
 #st.markdown("---")
 
 
-with st.spinner("Loading Google Sheet..."):
-    df_raw = load_google_sheet(GOOGLE_SHEET_URL, gcp_creds)
-    
+def load_sheet_versioned(sheet_url: str, creds_json: dict):
+    """Raw sheet plus its content fingerprint (computed once per fetch, in the refresh thread)."""
+    df = load_google_sheet(sheet_url, creds_json, CACHE_DIR, SHEET_SYNC_MODE)
+    return df, frame_fingerprint(df)
 
 
-if df_raw.empty:
-    st.error("⚠️ Google Sheet returned no data.")
-    st.stop()
+@st.cache_resource(show_spinner="Cleaning inspection data...", max_entries=2)
+def ingest(fingerprint: str, _raw: pd.DataFrame):
+    """
+    Rename → schema → date/time → GPS → dedup → derived metrics, once per data version.
+    Keyed only by the fingerprint: reruns and other sessions share the cleaned frame,
+    so it must be treated as read-only.
+    """
+    return clean_inspections(_raw)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def date_index(fingerprint: str, _df: pd.DataFrame) -> DateIndex:
+    """Date-sorted view of the cleaned frame (binary-search range filter), once per data version."""
+    return DateIndex(_df)
 
-# 🏷️ Rename Google Sheet columns
-COLUMN_RENAME_MAP = {
-    "Created At": "created_at",
-    "तहसील": "tehsil",
-    "विकास खंड": "block",
-    "गांव": "village",
-    "भूमि गाटा संख्या": "plot_gata_number",
-    "क्षेत्रफल ( हे)": "plot_area",
-    "बुवाई की गई भूमि": "reported_cultivation",
-    "GPS Location": "plot_gps_location",
-    "अधिकारी का नाम": "officer_name",
-    "अधिकारी पद": "officer_designation",
-    "अभिकारी मोबाइल नंबर": "officer_contact",
-    "गोशाला का नाम": "goshala_name",
-    "कुल बुवाई पाई गई क्षेत्रफल( हे में)": "area_actual_cultivated",
-    "फसल की गुणवत्ता": "crop_quality",
-    "सेल्फी ले": "photo_selfie",
-    "फसल की फोटो": "photo_field",
-    "Date": "date",
-    "Time": "time",
-    "GPS Location inspection": "gps_inspection",
-}
 
+@st.cache_resource(show_spinner=False, max_entries=2)
+def rollup_index(fingerprint: str, _df: pd.DataFrame) -> DateIndex:
+    """
+    Block × village × day rollup, coarsened to block × day and date-indexed, once per
+    data version: block tables/KPIs for any date range are sums over a small slice.
+    """
+    return DateIndex(coarsen_rollup(build_rollup(_df), ["block", "created_date"]))
 
-df_raw.columns = df_raw.columns.str.strip()
-df_raw = df_raw.rename(columns=COLUMN_RENAME_MAP)
 
-# Extract date/time
-if "created_at" in df_raw.columns:
-    #st.markdown("created_at column found")
-    df_raw["created_at"] = pd.to_datetime(df_raw["created_at"], errors="coerce")
-    df_raw["created_date"] = df_raw["created_at"].dt.date
-    df_raw["created_time"] = df_raw["created_at"].dt.time
-    #st.markdown(f"created_at: {df_raw["created_date"]}")
+@st.cache_data(show_spinner=False, max_entries=8)
+def map_levels_cached(cache_key: str, _dfm: pd.DataFrame, _focus_rows: pd.DataFrame) -> list:
+    """Map detail levels (grid cells per zoom band + top-level markers), once per data version, date range and focus."""
+    return map_levels(_dfm, _focus_rows)
 
-# Parse GPS coordinates
-if "plot_gps_location" in df_raw.columns:
-    df_raw = parse_gps_column(df_raw, "gps_inspection")
 
-#remove duplicate entrues fo the same day - village + block filter
-df_raw = remove_duplicates(df_raw)
+sheet_snapshot = get_snapshot(f"sheet:{GOOGLE_SHEET_URL}", SHEET_REFRESH_SECONDS)
+with st.spinner("Loading Google Sheet..."):
+    sheet_raw, sheet_fingerprint = sheet_snapshot.get(lambda: load_sheet_versioned(GOOGLE_SHEET_URL, gcp_creds))
+run_timer.mark("sheet loaded")
     
 
-st.sidebar.success(f"✅ Loaded {len(df_raw)} records from Google Sheet")
+
+if sheet_raw.empty:
+    st.error("⚠️ Google Sheet returned no data.")
+    st.stop()
+
+df_raw, schema_report = ingest(sheet_fingerprint, sheet_raw)
+run_timer.mark("cleaned")
+
+
+st.sidebar.success(
+    f"✅ Loaded {len(df_raw)} records from Google Sheet · updated {format_age(sheet_snapshot.age)} ago"
+)
+st.sidebar.caption(
+    f"🧮 Ingest memory: {schema_report['memory_before'] / 1e6:.1f} MB → {schema_report['memory_after'] / 1e6:.1f} MB"
+)
+invalid = {col: n for col, n in schema_report["invalid"].items() if n}
+if invalid:
+    st.sidebar.caption("⚠️ Values rejected at ingest: " + ", ".join(f"{c} ({n})" for c, n in invalid.items()))
+if sheet_snapshot.last_error is not None:
+    st.sidebar.warning(f"⚠️ Background refresh failed, showing last snapshot: {sheet_snapshot.last_error}")
 
 # ----------------------------
 # BASELINE LOADING + RENAME
 # ----------------------------
-def rename_baseline_columns(df_base: pd.DataFrame) -> pd.DataFrame:
-    BASELINE_RENAME_MAP = {
-        "तहसील": "tehsil",
-        "विकास खंड": "block",
-        "गांव": "village",
-        "भूमि गाटा संख्या": "plot_gata_number",
-        "क्षेत्रफल ( हे)": "plot_area",
-        "बुवाई की गई भूमि": "reported_cultivation",
-        "GPS Location": "plot_gps_location",
-    }
-    if df_base.empty:
-        return df_base
-    df_base.columns = df_base.columns.str.strip()
-    df_base = df_base.rename(columns=BASELINE_RENAME_MAP)
-    return df_base
+@st.cache_data(show_spinner=False, max_entries=2)
+def load_baseline_cached(path: str, mtime_ns: int):
+    """Baseline via its Parquet copy, names normalized and plot GPS parsed; `mtime_ns` invalidates this cache when the xlsx changes."""
+    return prepare_baseline(load_baseline(path, CACHE_DIR))
 
 
+baseline_version = 0
 with st.spinner("Loading baseline reference data..."):
     if os.path.exists(BASELINE_PATH):
         try:
-            df_base = pd.read_excel(BASELINE_PATH)
-            df_base = rename_baseline_columns(df_base)
+            baseline_version = os.stat(BASELINE_PATH).st_mtime_ns
+            df_base, base_gps_rejected = load_baseline_cached(BASELINE_PATH, baseline_version)
             st.sidebar.success(f"📘 Baseline loaded: {len(df_base)} rows")
+            if any(base_gps_rejected.values()):
+                st.sidebar.caption(f"⚠️ Baseline GPS values rejected: {sum(base_gps_rejected.values())}")
         except Exception as e:
             st.sidebar.error(f"❌ Baseline load error: {e}")
             df_base = pd.DataFrame()
     else:
         st.sidebar.warning("⚠️ Baseline file not found.")
         df_base = pd.DataFrame()
+run_timer.mark("baseline loaded")
+
+
+# ----------------------------
+# LAZY DOWNLOADS (Excel + bulk export)
+# ----------------------------
+@st.cache_data(show_spinner="Preparing download...", max_entries=32)
+def export_bytes(cache_key: str, sheet_name: str, fmt: str, _frame: pd.DataFrame) -> bytes:
+    """File bytes, built once per (data version + date filter, file)."""
+    return to_excel_bytes(_frame, sheet_name) if fmt == "xlsx" else table_bytes(_frame, fmt)
+
+
+def lazy_download_button(label: str, frame, file_name: str, sheet_name: str, cache_key: str, fmt: str = "xlsx"):
+    """
+    Shows a "Prepare" button; the file is only serialized once it is clicked,
+    after which the regular download button stays for that data version + filter.
+    `frame` may be a DataFrame or a zero-argument function returning one.
+    """
+    prepared = st.session_state.setdefault("prepared_exports", set())
+    key = f"{cache_key}:{file_name}"
+    if key not in prepared:
+        if not st.button(f"⚙️ Prepare {file_name}", key=f"prepare_{file_name}"):
+            return
+        prepared.add(key)
+    mime = XLSX_MIME if fmt == "xlsx" else EXPORT_FORMATS[fmt][1]
+    data = export_bytes(key, sheet_name, fmt, frame() if callable(frame) else frame)
+    st.download_button(label, data, file_name, mime=mime)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def plot_index(baseline_version: int, _df_base: pd.DataFrame) -> PlotIndex:
+    """Spatial (grid hash) index over baseline plot GPS, once per baseline file version."""
+    if "plot_latitude" not in _df_base.columns:
+        return PlotIndex([], [])
+    return PlotIndex(_df_base["plot_latitude"], _df_base["plot_longitude"])
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def plot_join(fingerprint: str, baseline_version: int, _df_raw: pd.DataFrame, _df_base: pd.DataFrame):
+    """
+    Baseline plot hash-join index on (block, village, gata) plus the plot of every
+    inspection (by df_raw row label), once per sheet + baseline version.
+    """
+    join = PlotJoin(_df_base)
+    return join, pd.Series(join.assign(_df_raw), index=_df_raw.index)
+
+
+@st.cache_resource(show_spinner="Building export tables...", max_entries=2)
+def bulk_tables(cache_key: str, _df: pd.DataFrame, _base: pd.DataFrame) -> dict:
+    """Cleaned inspections, baseline join and block aggregates, once per data version."""
+    return export_tables(_df, _base)
+
+
+with st.sidebar.expander("📦 Bulk export (all cleaned data)"):
+    bulk_key = f"{sheet_fingerprint}:{baseline_version}"
+    bulk_format = st.selectbox("Format", list(EXPORT_FORMATS), key="bulk_export_format")
+    for table in ["inspections", "plot_status", "block_summary"]:
+        lazy_download_button(
+            f"📥 {table}{EXPORT_FORMATS[bulk_format][0]}",
+            lambda table=table: bulk_tables(bulk_key, df_raw, df_base).get(table, pd.DataFrame()),
+            f"{table}{EXPORT_FORMATS[bulk_format][0]}", table, bulk_key, fmt=bulk_format,
+        )
+
+
+# ----------------------------
+# STARTUP PROFILE (filled at first render, updated at the end of the run)
+# ----------------------------
+profile_box = st.sidebar.expander("⏱️ Startup profile").empty()
+
+
+def show_startup_profile():
+    """Checkpoint times of this run and of the process's cold start, and the first import time of each heavy library."""
+    runs = {"this run": run_timer.marks}
+    cold = cold_run()
+    if cold is not None and not run_timer.is_cold:
+        runs["cold start"] = cold.marks
+    with profile_box.container():
+        st.caption("Seconds since the script run started")
+        st.dataframe(pd.DataFrame(runs).round(2), use_container_width=True)
+        if IMPORT_TIMES:
+            st.caption("First import in this process (seconds)")
+            st.dataframe(pd.Series(IMPORT_TIMES, name="import").round(2).to_frame(), use_container_width=True)
 
 
 
@@ -557,10 +948,10 @@ with tab1:
         # ================================
         from datetime import date
 
-        # Ensure proper date parsing
-        df_raw["created_date"] = pd.to_datetime(df_raw["created_date"], errors="coerce")
-        min_date = df_raw["created_date"].min()
-        max_date = df_raw["created_date"].max()
+        # created_date is already a datetime (midnight) column from ingest
+        df_dates = date_index(sheet_fingerprint, df_raw)
+        min_date = df_dates.min
+        max_date = df_dates.max
         min_date = min_date.date() if hasattr(min_date, "date") else min_date
         max_date = max_date.date() if hasattr(max_date, "date") else max_date
 
@@ -582,21 +973,32 @@ with tab1:
                 key="date_selector"
             )
 
-        # Filter dataframe based on selected date range
-        df_last = df_raw[
-            (df_raw["created_date"] >= pd.to_datetime(start))
-            & (df_raw["created_date"] <= pd.to_datetime(end))
-        ]
+        # Filter dataframe based on selected date range (cached, read-only view)
+        df_last = df_dates.between(start, end)
+        blocks_last = (
+            block_summary(rollup_index(sheet_fingerprint, df_raw).between(start, end))
+            if "block" in df_raw.columns else pd.DataFrame()
+        )
+        export_key = f"{sheet_fingerprint}:{baseline_version}:{start}:{end}"
 
     else:
         st.markdown("no created_date column found so no date selector")
-        df_last = df_raw.copy()
+        df_last = df_raw
+        blocks_last = block_summary(build_rollup(df_raw)) if "block" in df_raw.columns else pd.DataFrame()
+        export_key = f"{sheet_fingerprint}:{baseline_version}:all"
 
     
 
 
+    # Plot-level status for the selected range: a lookup into the cached join
+    if {"block", "village"} <= set(df_base.columns):
+        baseline_plots, plot_of = plot_join(sheet_fingerprint, baseline_version, df_raw, df_base)
+        plot_pos = plot_of.reindex(df_last.index, fill_value=-1).to_numpy()
+        plots_last = baseline_plots.status(plot_pos)
+    else:
+        plot_pos, plots_last = np.full(len(df_last), -1), None
+
     #df_last["crop_quality"] = df_last["crop_quality"].apply(normalize_quality)
-    df_last["plot_area"] = pd.to_numeric(df_last["plot_area"], errors="coerce")
 
     sub_overview, sub_area, sub_map, sub_photo  = st.tabs(["Overview", "Area", "Map", "Photo"])
 
@@ -617,25 +1019,15 @@ with tab1:
 
         #st.markdown("---")
         if "block" in df_last.columns:
-            # Prepare baseline (required) and actual (submitted) counts
-            base_counts = (
-                df_base.groupby("block").size().rename("required").reset_index()
-                if "block" in df_base.columns else pd.DataFrame(columns=["block", "required"])
-            )
-            actual_counts = df_last.groupby("block").size().rename("submitted").reset_index()
-
-            # Merge both
-            merged = pd.merge(base_counts, actual_counts, on="block", how="outer").fillna(0)
-            merged["required"] = merged["required"].astype(int)
-            merged["submitted"] = merged["submitted"].astype(int)
-            merged["remaining"] = (merged["required"] - merged["submitted"]).clip(lower=0)
-            merged["inspection_%"] = (merged["submitted"] / merged["required"].replace(0, np.nan) * 100).round(1)
+            # Baseline plots (required) vs submitted inspections; remaining = plots not inspected yet
+            merged = block_report(blocks_last, df_base, plots_last)[["block", "required", "submitted", "remaining", "inspection_%"]]
 
             # --- SUMMARY KPIs ---
             total_required = merged["required"].sum()
             total_submitted = merged["submitted"].sum()
             total_remaining = merged["remaining"].sum()
-            percent_done = (total_submitted / total_required * 100) if total_required > 0 else 0
+            total_completed = total_required - total_remaining
+            percent_done = (total_completed / total_required * 100) if total_required > 0 else 0
 
                 
             #2 main columns for data and pie chart
@@ -677,12 +1069,15 @@ with tab1:
                 )
 
                 st.markdown(html_table, unsafe_allow_html=True)
+                run_timer.mark("first render (overview KPIs)")
+                show_startup_profile()
 
             with col2:
+                px = plotly_express()
                 # --- Pie Chart of Completion ---
                 pie_df = pd.DataFrame({
                     "Status": ["Completed", "Pending"],
-                    "Count": [total_submitted, total_remaining]
+                    "Count": [total_completed, total_remaining]
                 })
                 fig_pie = px.pie(
                     pie_df,
@@ -773,51 +1168,56 @@ with tab1:
             #village wise details
             st.markdown("---")
             # --- Inspected vs Remaining charagah list ---
-            st.markdown("### 🏡 Detailed Village-wise Status")
-
-            if all(col in df_last.columns for col in ["village", "block", "plot_area", "latitude", "longitude"]):
-                inspected = df_last[["village", "block", "plot_area", "latitude", "longitude"]].copy()
-                inspected["status"] = "Inspected"
-
-                baseline_villages = df_base[["village", "block", "plot_area", "plot_gps_location"]] if "village" in df_base.columns else pd.DataFrame()
-
-                if not baseline_villages.empty:
-                    # find remaining (villages present in baseline but not inspected)
-                    inspected_villages = inspected["village"].dropna().unique().tolist()
-                    remaining = baseline_villages[~baseline_villages["village"].isin(inspected_villages)].copy()
-                    remaining["status"] = "Not Inspected"
-
-                    combined = pd.concat([inspected, remaining], ignore_index=True, sort=False)
-                    combined = combined.fillna("")
-                    st.dataframe(combined)
-
-                    # Excel download for full village list
-                    out_villages = BytesIO()
-                    with pd.ExcelWriter(out_villages, engine="openpyxl") as w:
-                        combined.to_excel(w, index=False, sheet_name="charagah_status")
-                    st.download_button(
-                        "📥 Download Village-wise Details",
-                        out_villages.getvalue(),
-                        "village_inspection_details.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                    )
-                else:
-                    st.info("Baseline villages not available for comparison.")
+            st.markdown("### 🏡 Detailed Plot-wise Status")
+
+            if plots_last is not None:
+                # one row per baseline plot: inspections in range + Inspected / Not Inspected
+                combined = plots_last.astype(object).fillna("")
+                st.dataframe(combined)
+
+                unmatched = df_last.loc[plot_pos < 0, [c for c in ["block", "village", "plot_gata_number", "created_at"] if c in df_last.columns]]
+                if not unmatched.empty:
+                    with st.expander(f"⚠️ {len(unmatched):,} inspections match no baseline plot (block, village, gata number)"):
+                        st.dataframe(unmatched, use_container_width=True)
+
+                # Excel download for full plot list (built on demand)
+                lazy_download_button(
+                    "📥 Download Plot-wise Details", combined,
+                    "plot_inspection_details.xlsx", "charagah_status", export_key
+                )
             else:
-                st.warning("Village / Area / GPS data missing in Sheet.")
+                st.info("Baseline plots not available for comparison.")
+
+            # --- Location verification: inspection GPS vs nearest baseline plot GPS ---
+            st.markdown("---")
+            st.markdown("### 📍 Location Verification")
+            plots = plot_index(baseline_version, df_base)
+            if len(plots) == 0:
+                st.info("Baseline plots have no GPS coordinates yet — location verification is unavailable.")
+            elif {"latitude", "longitude"} <= set(df_last.columns):
+                matched = df_last[["block", "village", "latitude"]].join(match_to_plots(df_last, df_base, plots))
+                matched = matched[matched["latitude"].notna()]
+                n_verified = int(matched["location_verified"].sum())
+                plots_covered = matched.loc[matched["location_verified"], "nearest_plot"].nunique()
+                st.caption(
+                    f"{n_verified:,} of {len(matched):,} inspections with GPS are within {LOCATION_MATCH_METERS} m "
+                    f"of a baseline plot · {plots_covered:,} of {len(plots):,} mapped plots have a verified inspection."
+                )
+                location_table = matched.groupby("block", observed=True).agg(
+                    inspections_with_gps=("location_verified", "size"),
+                    verified=("location_verified", "sum"),
+                    median_distance_m=("plot_distance_m", "median"),
+                ).reset_index()
+                location_table["verified_%"] = (location_table["verified"] / location_table["inspections_with_gps"] * 100).round(1)
+                st.dataframe(location_table.round({"median_distance_m": 0}), use_container_width=True)
             
             
             #download link
             st.markdown("---")
             # --- Table Excel Download ---
-            out_summary = BytesIO()
-            with pd.ExcelWriter(out_summary, engine="openpyxl") as w:
-                merged.to_excel(w, index=False, sheet_name="block_summary")
-            st.download_button(
-                "📥 Download Block Summary Table",
-                out_summary.getvalue(),
-                "block_summary_table.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            lazy_download_button(
+                "📥 Download Block Summary Table", merged,
+                "block_summary_table.xlsx", "block_summary", export_key
             )
 
         else:
@@ -835,34 +1235,21 @@ with tab1:
 
 
         
-        # 🔹 Use only inspected entries
-        df_inspected = df_last[df_last["crop_quality"].notna()].copy()
-        df_inspected = df_inspected[df_inspected["crop_quality"].astype(str).str.strip() != ""]
-
-        if df_inspected.empty:
+        # 🔹 Use only inspected entries (block sums come from the rollup cube slice)
+        if blocks_last.empty or blocks_last["inspected"].sum() == 0:
             st.warning("No inspected data available to display.")
             st.stop()
 
-        # Convert numeric columns
-        df_inspected["plot_area"] = pd.to_numeric(df_inspected["plot_area"], errors="coerce")
-        df_inspected["area_actual_cultivated"] = pd.to_numeric(df_inspected["area_actual_cultivated"], errors="coerce")
-        df_inspected["crop_quality"] = pd.to_numeric(df_inspected["crop_quality"], errors="coerce")
-
-        # Compute % cultivated per row
-        df_inspected["area_cultivated_%"] = (df_inspected["area_actual_cultivated"] / df_inspected["plot_area"] * 100).clip(0, 100)
-
         # --- Block-wise Aggregates ---
-        block_agg = df_inspected.groupby("block").agg(
-            total_plot_area=("plot_area", "sum"),
-            total_cultivated=("area_actual_cultivated", "sum"),
-            avg_quality=("crop_quality", "mean"),
-            inspected_count=("village", "count")
-        ).reset_index()
+        block_agg = blocks_last.loc[
+            blocks_last["inspected"] > 0,
+            ["block", "total_plot_area", "total_cultivated", "avg_quality", "avg_quality_pct", "inspected_count"],
+        ].reset_index(drop=True)
 
         # % cultivated
         block_agg["cultivated_%"] = (block_agg["total_cultivated"] / block_agg["total_plot_area"] * 100).round(0)
-        # Quality % normalized to 0–100 (assuming max 5)
-        block_agg["quality_%"] = (block_agg["avg_quality"] / 5 * 100).round(0)
+        # Quality % normalized to 0–100 (mean of the per-row quality_%)
+        block_agg["quality_%"] = block_agg.pop("avg_quality_pct").round(0)
         # Production expected = cultivated% * quality% / 100
         block_agg["production_%"] = (block_agg["cultivated_%"] * block_agg["quality_%"] / 100).round(0)
 
@@ -876,6 +1263,7 @@ with tab1:
         st.markdown("---")
         # --- PIE CHARTS (Aggregate Overview) ---
         st.markdown("### 📊 Overall Aggregation")
+        px = plotly_express()
         col1, col2, col3, col4 = st.columns(4)
 
         with col1:
@@ -927,9 +1315,9 @@ with tab1:
         with col4:
             # Reuse total inspection data from overview
             if "block" in df_last.columns:
-                base_counts = df_base.groupby("block").size().sum() if "block" in df_base.columns else 0
-                actual_counts = df_last.groupby("block").size().sum()
-                remaining_counts = base_counts - actual_counts if base_counts > 0 else 0
+                completion = block_report(blocks_last, df_base, plots_last)
+                remaining_counts = completion["remaining"].sum()
+                actual_counts = completion["required"].sum() - remaining_counts
                 pie_inspect = pd.DataFrame({
                     "Status": ["Inspected", "Pending"],
                     "Count": [actual_counts, remaining_counts]
@@ -978,10 +1366,7 @@ with tab1:
         st.dataframe(block_agg[["block", "total_plot_area", "total_cultivated", "cultivated_%"]].sort_values(by="cultivated_%", ascending=False))
 
         # Excel download
-        out_cult = BytesIO()
-        with pd.ExcelWriter(out_cult, engine="openpyxl") as w:
-            block_agg.to_excel(w, index=False, sheet_name="area_cultivated")
-        st.download_button("📥 Download Cultivated Area Data", out_cult.getvalue(), "blockwise_cultivated_area.xlsx")
+        lazy_download_button("📥 Download Cultivated Area Data", block_agg, "blockwise_cultivated_area.xlsx", "area_cultivated", export_key)
         st.markdown("---")
 
         # =========================================================
@@ -1009,10 +1394,7 @@ with tab1:
         st.markdown("---")
         st.dataframe(block_agg[["block", "avg_quality", "quality_%"]].sort_values(by="quality_%", ascending=False))
 
-        out_quality = BytesIO()
-        with pd.ExcelWriter(out_quality, engine="openpyxl") as w:
-            block_agg.to_excel(w, index=False, sheet_name="quality")
-        st.download_button("📥 Download Quality Data", out_quality.getvalue(), "blockwise_quality_data.xlsx")
+        lazy_download_button("📥 Download Quality Data", block_agg, "blockwise_quality_data.xlsx", "quality", export_key)
 
         st.markdown("---")
 
@@ -1041,10 +1423,7 @@ with tab1:
         st.markdown("---")
         st.dataframe(block_agg[["block", "production_%"]].sort_values(by="production_%", ascending=False))
 
-        out_prod = BytesIO()
-        with pd.ExcelWriter(out_prod, engine="openpyxl") as w:
-            block_agg.to_excel(w, index=False, sheet_name="production")
-        st.download_button("📥 Download Production Data", out_prod.getvalue(), "blockwise_production_data.xlsx")
+        lazy_download_button("📥 Download Production Data", block_agg, "blockwise_production_data.xlsx", "production", export_key)
 
     # --- Map ---
     # --- MAP SUBTAB ---
@@ -1053,21 +1432,13 @@ with tab1:
         st.markdown('<div class="card">', unsafe_allow_html=True)
 
         if {"latitude", "longitude"} <= set(df_last.columns):
-            dfm = df_last.dropna(subset=["latitude", "longitude"]).copy()
+            # Numeric cleanup, derived metrics, hover fields and the categories of all
+            # map modes are computed column-wise in one pass
+            dfm = prepare_map_data(df_last)
 
             if dfm.empty:
                 st.warning("⚠️ No valid GPS coordinates available for mapping.")
             else:
-                # --- Numeric Cleanup ---
-                dfm["plot_area"] = pd.to_numeric(dfm.get("plot_area", 0), errors="coerce").fillna(0)
-                dfm["area_actual_cultivated"] = pd.to_numeric(dfm.get("area_actual_cultivated", 0), errors="coerce").fillna(0)
-                dfm["crop_quality"] = pd.to_numeric(dfm.get("crop_quality", 0), errors="coerce").fillna(0)
-
-                # --- Derived Metrics ---
-                dfm["area_%"] = (dfm["area_actual_cultivated"] / dfm["plot_area"] * 100).replace([np.inf, -np.inf], np.nan).fillna(0)
-                dfm["production_%"] = (dfm["area_%"] * (dfm["crop_quality"] / 5)).fillna(0)
-
-                
                 # -----------------------------
                 # ================================
                 # 🎛️ MAP MODE SELECTION (Green Tab Buttons)
@@ -1076,63 +1447,10 @@ with tab1:
                 # 🎛️ MAP MODE SELECTION (Green Tab Buttons - Fully Functional)
                 # ================================
 
-                modes = [
-                    "Inspection Status",
-                    "Area under Cultivation (%)",
-                    "Quality of Cultivation (1–5)",
-                    "Expected Production (%)"
-                ]
-
-                # --- Remember selected mode in session ---
-                if "map_mode" not in st.session_state:
-                    st.session_state.map_mode = modes[0]
-
-                # --- Custom CSS styling ---
-                st.markdown("""
-                <style>
-                .mode-tabs {
-                    display: flex;
-                    justify-content: center;
-                    flex-wrap: wrap;
-                    gap: 12px;
-                    margin-bottom: 18px;
-                    margin-top: -30px;
-                }
-                div[data-testid="stButton"] > button {
-                    border-radius: 10px !important;
-                    padding: -30px 18px !important;
-                    border: 2px solid #15803D !important;
-                    background-color: #E8F5E9 !important;
-                    color: #166534 !important;
-                    font-weight: 600 !important;
-                    transition: all 0.2s ease;
-                }
-                div[data-testid="stButton"] > button:hover {
-                    background-color: #bbf7d0 !important;
-                }
-                div[data-testid="stButton"].active > button {
-                    background-color: #166534 !important;
-                    color: white !important;
-                    border-color: #166534 !important;
-                    box-shadow: 0 2px 6px rgba(0,0,0,0.15);
-                }
-                </style>
-                """, unsafe_allow_html=True)
-
-                # --- Render as Streamlit buttons in columns ---
-                cols = st.columns(len(modes))
-                for i, m in enumerate(modes):
-                    with cols[i]:
-                        # Highlight active one
-                        container_class = "active" if st.session_state.map_mode == m else ""
-                        st.markdown(f'<div class="{container_class}">', unsafe_allow_html=True)
-                        if st.button(m, key=f"mode_{i}"):
-                            st.session_state.map_mode = m
-                        st.markdown("</div>", unsafe_allow_html=True)
-
-                # --- Selected mode ---
-                map_mode = st.session_state.map_mode
-
+                # Mode switching happens in the browser: the points, their category in
+                # every mode and the legends are shipped once, and the mode buttons
+                # inside the map component redraw the traces without a rerun.
+                modes = list(MAP_MODES)
 
                 # ================================
                 # 🏷️ Dynamic Map Title (Matches Theme)
@@ -1151,163 +1469,56 @@ with tab1:
                     "Expected Production (%)": "Calculated as Area% × Quality Score"
                 }
 
-                # --- Styled title ---
-                st.markdown(f"""
-                <div style='text-align:center; margin-top:0px; margin-bottom:0px;'>
-                    <h4 style='color:#166534; font-weight:700; margin-bottom:0px;'>{map_titles.get(map_mode, '🗺️ Map View')}</h4>
-                    <p style='color:#4b5563; font-size:15px;'>{map_subtitles.get(map_mode, '')}</p>
-                </div>
-                """, unsafe_allow_html=True)
-
-
-                # ================================
-                # 🧭 HOVER TEXT BUILDER
-                # ================================
-                def make_hover_text(row):
-                    parts = [f"<b>📍 Block:</b> {row['block']}", f"<b>Village:</b> {row['village']}"]
-                    if row.get("officer_name"):
-                        parts.append(f"<b>Officer:</b> {row['officer_name']} ({row.get('officer_designation','')})")
-                    parts.append(f"<b>Plot Area:</b> {row['plot_area']:.2f} ha")
-                    parts.append(f"<b>Area Cultivated:</b> {row['area_actual_cultivated']:.2f} ha")
-                    parts.append(f"<b>Area %:</b> {row['area_%']:.1f}%")
-                    parts.append(f"<b>Quality:</b> {row['crop_quality']:.1f}")
-                    parts.append(f"<b>Production %:</b> {row['production_%']:.1f}%")
-                    if row.get("created_at"):
-                        parts.append(f"<b>Date:</b> {str(row['created_at']).split(' ')[0]}")
-                    return "<br>".join(parts)
-
-                dfm["hover_text"] = dfm.apply(make_hover_text, axis=1)
-
-                # ================================
-                # 🎨 COLOR LOGIC
-                # ================================
-                def get_color(row):
-                    if map_mode == "Inspection Status":
-                        d = str(row.get("officer_designation", "")).upper()
-                        if not d or d == "NAN":
-                            return "black"
-                        elif "BDO" in d:
-                            return "blue"
-                        elif "CVO" in d:
-                            return "green"
-                        elif "सचिव" in d or "SEC" in d:
-                            return "red"
-                        else:
-                            return "gray"
-                    elif map_mode == "Area under Cultivation (%)":
-                        v = row["area_%"]
-                        return "red" if v < 50 else "blue" if v < 80 else "green"
-                    elif map_mode == "Quality of Cultivation (1–5)":
-                        q = row["crop_quality"]
-                        return "red" if q <= 2 else "blue" if q <= 4 else "green"
-                    elif map_mode == "Expected Production (%)":
-                        p = row["production_%"]
-                        return "red" if p < 50 else "blue" if p < 80 else "green"
-                    return "gray"
-
-                dfm["color"] = dfm.apply(get_color, axis=1)
 
                 # ================================
                 # 🗺️ BUILD PLOTLY MAP
                 # ================================
-                import plotly.graph_objects as go
-
-                # Define color mapping for current mode
-                if map_mode == "Inspection Status":
-                    color_map = {
-                        "Not Done": "black",
-                        "BDO": "blue",
-                        "CVO": "green",
-                        "सचिव": "red"
-                    }
-
-                    def classify(row):
-                        d = str(row.get("officer_designation", "")).upper()
-                        if not d or d == "NAN":
-                            return "Not Done"
-                        elif "BDO" in d:
-                            return "BDO"
-                        elif "CVO" in d:
-                            return "CVO"
-                        elif "सचिव" in d or "SEC" in d:
-                            return "सचिव"
-                        return "Other"
-
-                    dfm["category"] = dfm.apply(classify, axis=1)
-
-                elif map_mode == "Area under Cultivation (%)":
-                    color_map = {"< 50%": "red", "50–80%": "blue", "> 80%": "green"}
-
-                    def classify(row):
-                        val = row["area_%"]
-                        if val < 50:
-                            return "< 50%"
-                        elif val < 80:
-                            return "50–80%"
-                        else:
-                            return "> 80%"
-
-                    dfm["category"] = dfm.apply(classify, axis=1)
-
-                elif map_mode == "Quality of Cultivation (1–5)":
-                    color_map = {"<= 2": "red", "<= 4": "blue", "> 4": "green"}
-
-                    def classify(row):
-                        q = row["crop_quality"]
-                        if q <= 2:
-                            return "<= 2"
-                        elif q <= 4:
-                            return "<= 4"
-                        else:
-                            return "> 4"
+                with timed_import("plotly.graph_objects"):
+                    import plotly.graph_objects as go
 
-                    dfm["category"] = dfm.apply(classify, axis=1)
-
-                else:  # Expected Production
-                    color_map = {"< 50%": "red", "< 80%": "blue", "> 80%": "green"}
-
-                    def classify(row):
-                        p = row["production_%"]
-                        if p < 50:
-                            return "< 50%"
-                        elif p < 80:
-                            return "< 80%"
-                        else:
-                            return "> 80%"
-
-                    dfm["category"] = dfm.apply(classify, axis=1)
-
-                # --- Build figure with multiple traces (one per category) ---
+                # --- Layout only; the traces are drawn client-side from the payload ---
                 fig = go.Figure()
 
-                # --- Center and Zoom Control ---
-                if not dfm.empty:
-                    center_lat = dfm["latitude"].mean()
-                    center_lon = dfm["longitude"].mean()
-                else:
-                    center_lat, center_lon = 27.5, 80.5  # fallback (UP region default)
+                # --- Centre (initial view); the detail level follows the map's own zoom ---
+                focus_options = ["All blocks"] + sorted(dfm["block"].dropna().unique().tolist())
+                map_focus = st.selectbox("📍 Centre on", focus_options, key="map_focus")
+                focus_rows = dfm if map_focus == "All blocks" else dfm[dfm["block"] == map_focus]
+                center_lat = focus_rows["latitude"].mean()
+                center_lon = focus_rows["longitude"].mean()
+                map_zoom = 9 if map_focus == "All blocks" else 11
 
                 fig.update_layout(
                     mapbox=dict(
                         style="open-street-map",
                         center=dict(lat=center_lat, lon=center_lon),
-                        zoom=9
+                        zoom=map_zoom
                     )
                 )
 
+                # Every detail level is shipped once (cells per zoom band, markers at the
+                # top); the browser switches level on zoom, so pan/zoom needs no rerun
+                levels = map_levels_cached(f"{export_key}:{map_focus}", _dfm=dfm, _focus_rows=focus_rows)
+                top = levels[-1]
+                cell_km = [MAP_BIN_PIXELS * degrees_per_pixel(l["min_zoom"]) * 111 for l in levels[:-1]]
+                caption = (
+                    f"{len(dfm):,} inspections · zoom the map to change detail: grid cells "
+                    f"(≈ {cell_km[0]:.0f}–{cell_km[-1]:.1f} km; colour = most common category, size = count) "
+                    f"below zoom {MAP_MARKER_ZOOM}, individual markers from there on."
+                )
+                if top["markers"] < len(dfm):
+                    caption += (
+                        f" Over {MAP_MAX_MARKERS:,} inspections: individual markers only for "
+                        + (f"{map_focus} ({top['markers']:,})" if top["markers"] else "none")
+                        + " — pick a block under 📍 Centre on; elsewhere fine grid cells are shown."
+                    )
+                st.caption(caption)
 
-                for label, color in color_map.items():
-                    df_cat = dfm[dfm["category"] == label]
-                    if not df_cat.empty:
-                        fig.add_trace(go.Scattermapbox(
-                            lat=df_cat["latitude"],
-                            lon=df_cat["longitude"],
-                            mode="markers",
-                            marker=dict(size=22, color=color, opacity=0.85),
-                            text=df_cat["hover_text"],
-                            hovertemplate="%{text}<extra></extra>",
-                            name=label
-                        ))
+                payload = {
+                    "levels": levels,
+                    "titles": {m: [map_titles.get(m, "🗺️ Map View"), map_subtitles.get(m, "")] for m in modes},
+                }
+                # "</" would end the <script> element early
+                payload_js = json.dumps(payload, ensure_ascii=False).replace("</", "<\\/")
 
                 # --- Layout & Legend ---
                 fig.update_layout(
@@ -1333,14 +1544,34 @@ with tab1:
 
 
                 # ================================
-                # 🧭 HTML BORDER + ZOOM BUTTONS
+                # 🧭 HTML BORDER + MODE TABS + ZOOM BUTTONS
                 # ================================
                 from streamlit.components.v1 import html as st_html
 
+                mode_buttons = "".join(
+                    f'<button class="mode-tab" data-mode="{m}">{m}</button>' for m in modes
+                )
+
                 zoom_html = f"""
+                <style>
+                .mode-tabs {{ display:flex; justify-content:center; flex-wrap:wrap; gap:12px; margin-bottom:8px; }}
+                .mode-tab {{
+                    border-radius:10px; padding:6px 18px; border:2px solid #15803D; background-color:#E8F5E9;
+                    color:#166534; font-weight:600; cursor:pointer; transition:all 0.2s ease; font-family:sans-serif;
+                }}
+                .mode-tab:hover {{ background-color:#bbf7d0; }}
+                .mode-tab.active {{ background-color:#166534; color:white; border-color:#166534; box-shadow:0 2px 6px rgba(0,0,0,0.15); }}
+                </style>
+
+                <div class="mode-tabs">{mode_buttons}</div>
+                <div style='text-align:center; margin-top:0px; margin-bottom:0px; font-family:sans-serif;'>
+                    <h4 id="map-title" style='color:#166534; font-weight:700; margin:0px;'></h4>
+                    <p id="map-subtitle" style='color:#4b5563; font-size:15px; margin-top:4px;'></p>
+                </div>
+
                 <div style="position: relative; border:4px solid #15803D; border-radius:12px; overflow:hidden; background:#fff; box-shadow:0 2px 6px rgba(0,0,0,0.1);">
 
-                <div id="plotly-map" style="height:650px; width:100%;">
+                <div id="plotly-map-frame" style="height:650px; width:100%;">
                     {fig.to_html(include_plotlyjs='cdn', full_html=False, div_id='plotly-map')}
                 </div>
 
@@ -1350,16 +1581,77 @@ with tab1:
                 </div>
 
                 <script>
+                const MAP_DATA = {payload_js};
                 document.addEventListener('DOMContentLoaded', function() {{
                     const mapDiv = document.getElementById('plotly-map');
                     if (!mapDiv) return;
+
+                    // One trace per legend category of the mode and layer of the level;
+                    // markers and cells of a category share one legend entry
+                    function tracesFor(name, level) {{
+                        const shown = new Set();
+                        const traces = [];
+                        MAP_DATA.levels[level].layers.forEach(function(layer) {{
+                            const mode = layer.modes[name];
+                            mode.legend.forEach(function([label, color], code) {{
+                                const idx = [];
+                                mode.codes.forEach(function(c, j) {{ if (c === code) idx.push(j); }});
+                                if (!idx.length) return;
+                                const pick = a => Array.isArray(a) ? idx.map(j => a[j]) : a;
+                                traces.push({{
+                                    type: 'scattermapbox', mode: 'markers', name: label,
+                                    legendgroup: label, showlegend: !shown.has(label),
+                                    lat: pick(layer.lat), lon: pick(layer.lon),
+                                    marker: {{size: pick(layer.size), color: color, opacity: 0.85}},
+                                    customdata: pick(layer.customdata),
+                                    hovertemplate: mode.hovertemplate,
+                                }});
+                                shown.add(label);
+                            }});
+                        }});
+                        return traces;
+                    }}
+
                     function getZoom() {{
                         const layout = mapDiv._fullLayout || {{}};
-                        return layout.mapbox?.zoom || 9;
+                        return layout.mapbox?.zoom ?? {map_zoom};
                     }}
+                    function levelFor(zoom) {{
+                        let level = 0;
+                        MAP_DATA.levels.forEach(function(l, i) {{ if (zoom >= l.min_zoom) level = i; }});
+                        return level;
+                    }}
+
+                    let currentMode = {json.dumps(modes[0], ensure_ascii=False)};
+                    let currentLevel = levelFor({map_zoom});
+                    function draw() {{
+                        Plotly.react(mapDiv, tracesFor(currentMode, currentLevel), mapDiv.layout);  // keeps the current pan/zoom
+                    }}
+                    function setMode(name) {{
+                        currentMode = name;
+                        draw();
+                        document.getElementById('map-title').textContent = MAP_DATA.titles[name][0];
+                        document.getElementById('map-subtitle').textContent = MAP_DATA.titles[name][1];
+                        document.querySelectorAll('.mode-tab').forEach(function(b) {{
+                            b.classList.toggle('active', b.dataset.mode === name);
+                        }});
+                    }}
+                    document.querySelectorAll('.mode-tab').forEach(function(b) {{
+                        b.addEventListener('click', () => setMode(b.dataset.mode));
+                    }});
+                    setMode(currentMode);
+
+                    // Scroll zoom, the +/− buttons and the mapbox controls all end in a relayout
+                    mapDiv.on('plotly_relayout', function() {{
+                        const level = levelFor(getZoom());
+                        if (level !== currentLevel) {{
+                            currentLevel = level;
+                            draw();
+                        }}
+                    }});
+
                     function zoom(delta) {{
-                        const newZoom = getZoom() + delta;
-                        Plotly.relayout(mapDiv, {{'mapbox.zoom': newZoom}});
+                        Plotly.relayout(mapDiv, {{'mapbox.zoom': getZoom() + delta}});
                     }}
                     document.getElementById('zoom-in').addEventListener('click', () => zoom(+0.5));
                     document.getElementById('zoom-out').addEventListener('click', () => zoom(-0.5));
@@ -1368,19 +1660,14 @@ with tab1:
                 </div>
                 """
 
-                st_html(zoom_html, height=700)
+                st_html(zoom_html, height=800)
 
                 # ================================
                 # 📋 DATA TABLE BELOW MAP
                 # ================================
                 st.markdown("---")
                 st.markdown("#### 📋 Data Used in Map Visualization")
-                display_cols = [
-                    "block", "village", "officer_name", "officer_designation",
-                    "plot_area", "area_actual_cultivated", "area_%", "crop_quality",
-                    "production_%", "latitude", "longitude"
-                ]
-                display_cols = [c for c in display_cols if c in dfm.columns]
+                display_cols = [c for c in MAP_DATA_COLUMNS if c in dfm.columns]
 
                 st.dataframe(
                     dfm[display_cols].round(2).style.set_properties(**{
@@ -1390,14 +1677,9 @@ with tab1:
                     use_container_width=True
                 )
 
-                out_map = BytesIO()
-                with pd.ExcelWriter(out_map, engine="openpyxl") as w:
-                    dfm[display_cols].to_excel(w, index=False, sheet_name="map_data")
-                st.download_button(
-                    "📥 Download Map Data (Excel)",
-                    out_map.getvalue(),
-                    "inspection_map_data.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                lazy_download_button(
+                    "📥 Download Map Data (Excel)", dfm[display_cols],
+                    "inspection_map_data.xlsx", "map_data", export_key
                 )
 
         else:
@@ -1412,9 +1694,7 @@ with tab1:
     # --- PHOTO SUBTAB ---
     # --- PHOTO SUBTAB ---
     with sub_photo:
-        import re, json, requests, html
-        from io import BytesIO
-        from PIL import Image
+        import html
         from streamlit.components.v1 import html as st_html
 
         #st.markdown("<h3 style='text-align:center; color:#2E7D32;'>📸 Photo Analytics — From Submission Data</h3>", unsafe_allow_html=True)
@@ -1429,23 +1709,28 @@ with tab1:
             m = re.search(r"(IMG-[\d_]+[a-zA-Z0-9]+\.jpe?g)", url)
             return m.group(1) if m else None
 
-        df_last["photo_selfie_name"] = df_last["photo_selfie"].apply(extract_filename_from_url)
-        df_last["photo_field_name"] = df_last["photo_field"].apply(extract_filename_from_url)
+        # df_last is a shared cached view — add the photo columns on a copy
+        df_photo = df_last.copy()
+        df_photo["photo_selfie_name"] = df_photo["photo_selfie"].apply(extract_filename_from_url)
+        df_photo["photo_field_name"] = df_photo["photo_field"].apply(extract_filename_from_url)
 
         # ================================================================
         # 2️⃣ Load Google Drive photos and normalize URLs
         # ================================================================
         drive_folder_id = "1SO-p_yU7ARjEsMIcEqu7m2T8Dh2Bt4BJ"
         try:
-            df_drive = fetch_drive_photos(folder_id=drive_folder_id, _creds_json=st.secrets["gcp_service_account"])
+            drive_creds = st.secrets["gcp_service_account"]
+            df_drive = get_snapshot(f"drive:{drive_folder_id}", DRIVE_REFRESH_SECONDS).get(
+                lambda: fetch_drive_photos(folder_id=drive_folder_id, _creds_json=drive_creds)
+            )
             #st.success(f"✅ Loaded {len(df_drive)} photos from Google Drive.")
         except Exception as e:
             st.error(f"❌ Failed to load Drive photos: {e}")
             df_drive = pd.DataFrame(columns=["file_name", "public_url"])
 
         drive_map = dict(zip(df_drive["file_name"], df_drive["public_url"]))
-        df_last["photo_selfie_url"] = df_last["photo_selfie_name"].map(drive_map)
-        df_last["photo_field_url"] = df_last["photo_field_name"].map(drive_map)
+        df_photo["photo_selfie_url"] = df_photo["photo_selfie_name"].map(drive_map)
+        df_photo["photo_field_url"] = df_photo["photo_field_name"].map(drive_map)
 
         def normalize_drive_url(url):
             if not isinstance(url, str) or not url:
@@ -1457,45 +1742,49 @@ with tab1:
             return f"https://drive.usercontent.google.com/download?id={file_id}"
 
         for col in ["photo_selfie_url", "photo_field_url"]:
-            df_last[col] = df_last[col].apply(normalize_drive_url)
+            df_photo[col] = df_photo[col].apply(normalize_drive_url)
 
         # ================================================================
         # 3️⃣ Debug Table
         # ================================================================
         #st.markdown("### 🧩 Debug: Sample Mapped URLs")
-        #st.dataframe(df_last[["village", "block", "photo_selfie_url", "photo_field_url"]].head(10))
+        #st.dataframe(df_photo[["village", "block", "photo_selfie_url", "photo_field_url"]].head(10))
 
         # ================================================================
         # 4️⃣ Function to render gallery (iframe-safe)
         # ================================================================
-        import base64
-
         def render_gallery(photo_urls, captions, gallery_id="gallery1"):
-            """Renders image gallery with base64 inline encoding (Streamlit-safe)."""
+            """Renders image gallery from locally served thumbnails / previews (Streamlit-safe)."""
             if not photo_urls:
                 st.warning("⚠️ No photos to display.")
                 return
 
-            # Fetch and encode images as base64
-            encoded_photos = []
-            for i, url in enumerate(photo_urls):
-                try:
-                    resp = requests.get(url, timeout=10)
-                    if resp.status_code == 200 and "image" in resp.headers.get("Content-Type", ""):
-                        img_b64 = base64.b64encode(resp.content).decode("utf-8")
-                        mime = resp.headers.get("Content-Type", "image/jpeg")
-                        encoded_photos.append(f"data:{mime};base64,{img_b64}")
-                    else:
-                        st.write(f"⚠️ Skipped non-image or failed URL: {url}")
-                except Exception as e:
-                    st.write(f"❌ Error fetching {url}: {e}")
+            # Images are served by URL from the local media route: the HTML only carries
+            # short links, and the browser caches each image across reruns and sessions
+            fetcher = get_photo_fetcher()
+            progress = st.progress(0.0, text="Loading photos...")
+            media = fetcher.fetch_many(
+                photo_urls, fetch=fetcher.media_urls,
+                progress=lambda done, total: progress.progress(done / total, text=f"Loading photos... {done}/{total}"),
+            )
+            progress.empty()
+
+            thumbs, previews, shown_captions = [], [], []
+            for url, caption, urls in zip(photo_urls, captions, media):
+                if urls:
+                    thumbs.append(urls["thumb"])
+                    previews.append(urls["preview"])
+                    shown_captions.append(caption)
+                else:
+                    st.write(f"⚠️ Skipped non-image or failed URL: {url}")
 
-            if not encoded_photos:
+            if not thumbs:
                 st.warning("⚠️ No valid image data after download.")
                 return
 
-            photo_json = json.dumps(encoded_photos)
-            caption_json = json.dumps(captions)
+            thumb_json = json.dumps(thumbs)
+            photo_json = json.dumps(previews)
+            caption_json = json.dumps(shown_captions)
 
             gallery_html = f"""
             <html>
@@ -1557,9 +1846,9 @@ with tab1:
 
             <div class="gallery" style="margin-bottom:0; padding-bottom:0;">
                 {"".join([
-                    f"<img src='{html.escape(u)}' alt='{html.escape(c)}' onclick='openModal({i})' "
+                    f"<img src='{html.escape(u)}' alt='{html.escape(c)}' loading='lazy' onclick='openModal({i})' "
                     f"style='display:block; margin:0; padding:0;'/>"
-                    for i,(u,c) in enumerate(zip(encoded_photos,captions))
+                    for i,(u,c) in enumerate(zip(thumbs,shown_captions))
                 ])}
             </div>
 
@@ -1572,6 +1861,7 @@ with tab1:
             </div>
 
             <script>
+            const thumbs = {thumb_json};
             const photos = {photo_json};
             const captions = {caption_json};
             let currentIndex = 0;
@@ -1579,7 +1869,11 @@ with tab1:
             function openModal(i) {{
                 currentIndex = i;
                 document.getElementById("modal").style.display = "block";
-                document.getElementById("modal-img").src = photos[i];
+                const img = document.getElementById("modal-img");
+                img.src = thumbs[i];  // instant placeholder while the preview loads
+                const full = new Image();
+                full.onload = () => {{ if (currentIndex === i) img.src = full.src; }};
+                full.src = photos[i];
                 document.getElementById("modal-caption").innerText = captions[i];
             }}
             function closeModal() {{
@@ -1603,61 +1897,73 @@ with tab1:
         # ================================================================
         # 5️⃣ Block Tabs + Village Galleries
         # ================================================================
-        blocks = sorted(df_last["block"].dropna().unique())
+        blocks = sorted(df_photo["block"].dropna().unique())
         if not blocks:
             st.warning("⚠️ No block data available.")
         else:
             #st.markdown("### 🏢 Select Block to View Photos")
             block_tabs = st.tabs(blocks)
 
+            def render_paged_gallery(df_photos, gallery_id):
+                """Render one page of a photo set (columns: url, caption) with a page selector."""
+                n_pages = max(1, math.ceil(len(df_photos) / PHOTOS_PER_PAGE))
+                page = 1
+                if n_pages > 1:
+                    page = st.number_input(
+                        f"Page (1–{n_pages}, {PHOTOS_PER_PAGE} photos each)",
+                        min_value=1, max_value=n_pages, value=1, key=f"page_{gallery_id}"
+                    )
+                chunk = df_photos.iloc[(page - 1) * PHOTOS_PER_PAGE: page * PHOTOS_PER_PAGE]
+                render_gallery(chunk["url"].tolist(), chunk["caption"].tolist(), gallery_id=gallery_id)
+
             for b_i, block in enumerate(blocks):
                 with block_tabs[b_i]:
-                    df_block = df_last[df_last["block"] == block].copy()
+                    df_block = df_photo[df_photo["block"] == block]
 
                     # --- Block Gallery ---
                     st.markdown(f"#### 🏞️ {block} Block All Inspection Photos")
                     st.markdown("---")
 
-                    # Melt to combine selfie + field photos while keeping village info
-                    df_block_long = (
+                    # One photo set per block (selfie + field photos, with village info),
+                    # shared by the block gallery and the village gallery below
+                    id_vars = [c for c in ["village", "block", "date"] if c in df_block.columns]
+                    block_photos = (
                         df_block.melt(
-                            id_vars=["village", "block", "date"],
+                            id_vars=id_vars,
                             value_vars=["photo_selfie_url", "photo_field_url"],
                             var_name="photo_type",
                             value_name="url"
                         )
                         .dropna(subset=["url"])
+                        .drop_duplicates(subset=["url"])
                         .reset_index(drop=True)
                     )
+                    # Captions: village - block - date
+                    block_photos["caption"] = (
+                        block_photos["village"].astype(str) + " - " + str(block) + " - "
+                        + (block_photos["date"].astype(str) if "date" in block_photos else "")
+                    )
 
-                    # Extract unique URLs and create matching captions (village - block - date)
-                    block_photos = df_block_long["url"].unique().tolist()
-                    block_captions = [
-                        f"{row['village']} - {row['block']} - {row['date'] if 'date' in row else ''}"
-                        for _, row in df_block_long.iterrows()
-                        if row["url"] in block_photos
-                    ]
-
-                    # Render gallery using base64-safe display
-                    render_gallery(block_photos, block_captions, gallery_id=f"block_{block}")
+                    if block_photos.empty:
+                        st.warning("⚠️ No photos to display.")
+                    else:
+                        render_paged_gallery(block_photos, gallery_id=f"block_{block}")
 
                     st.markdown("---")
 
-                    # --- Village Galleries ---
+                    # --- Village Gallery (built only for the selected village) ---
                     villages = sorted(df_block["village"].dropna().unique())
-                    for v in villages:
+                    v = st.selectbox(
+                        "📍 Select village to view its inspection photos",
+                        ["—"] + villages,
+                        key=f"village_{block}"
+                    )
+                    if v != "—":
                         st.markdown(f"##### 📍  {v} Village all Inspections Photos")
                         st.markdown("---")
-                        df_v = df_block[df_block["village"] == v].copy()
-
-                        photos, captions = [], []
-                        for c in ["photo_selfie_url", "photo_field_url"]:
-                            for u in df_v[c].dropna().unique():
-                                photos.append(u)
-                                captions.append(f"{v} - {block} - {df_v['date'].iloc[0] if 'date' in df_v else ''}")
-
-                        if photos:
-                            render_gallery(photos, captions, gallery_id=f"{v}_{block}")
+                        village_photos = block_photos[block_photos["village"] == v]
+                        if not village_photos.empty:
+                            render_paged_gallery(village_photos, gallery_id=f"{v}_{block}")
                         else:
                             st.warning("⚠️ No photos found for this village.")
 
@@ -1670,5 +1976,7 @@ with tab2:
 
 
 
+run_timer.mark("full run")
+show_startup_profile()
 
 # ------------------- END -------------------
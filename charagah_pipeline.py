@@ -0,0 +1,1248 @@
+"""
+🐄 Goshala Inspection Dashboard — data pipeline helpers
+Plain pandas/numpy functions used by the Streamlit dashboard
+(charagah_inspection_v4.py). Importable without a Streamlit session,
+so benchmarks and scripts can reuse them.
+
+Scheduled reports without the dashboard:
+
+    python charagah_pipeline.py report --credentials service_account.json \
+        --sheet-url <sheet url> --start 2025-11-01 --format xlsx parquet
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+# ----------------------------
+# SCHEMA (applied once at ingest)
+# ----------------------------
+# 🏷️ Google Sheet header → dashboard column name
+COLUMN_RENAME_MAP = {
+    "Created At": "created_at",
+    "तहसील": "tehsil",
+    "विकास खंड": "block",
+    "गांव": "village",
+    "भूमि गाटा संख्या": "plot_gata_number",
+    "क्षेत्रफल ( हे)": "plot_area",
+    "बुवाई की गई भूमि": "reported_cultivation",
+    "GPS Location": "plot_gps_location",
+    "अधिकारी का नाम": "officer_name",
+    "अधिकारी पद": "officer_designation",
+    "अभिकारी मोबाइल नंबर": "officer_contact",
+    "गोशाला का नाम": "goshala_name",
+    "कुल बुवाई पाई गई क्षेत्रफल( हे में)": "area_actual_cultivated",
+    "फसल की गुणवत्ता": "crop_quality",
+    "सेल्फी ले": "photo_selfie",
+    "फसल की फोटो": "photo_field",
+    "Date": "date",
+    "Time": "time",
+    "GPS Location inspection": "gps_inspection",
+}
+
+# Column type after renaming; columns not listed stay as text
+SHEET_SCHEMA = {
+    "created_at": "datetime",
+    "tehsil": "category",
+    "block": "category",
+    "village": "category",
+    "officer_designation": "category",
+    "plot_area": "float64",
+    "reported_cultivation": "float64",
+    "area_actual_cultivated": "float64",
+    "crop_quality": "quality",
+}
+# Expected "Created At" layout, then the other layouts seen in the sheet (day first, as typed in India);
+# values matching none of them are left empty and counted as invalid
+CREATED_AT_FORMAT = "%Y-%m-%d %H:%M:%S"
+CREATED_AT_FALLBACK_FORMATS = (
+    "%Y-%m-%d %H:%M", "%Y-%m-%d",
+    "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y",
+    "%d-%m-%Y %H:%M:%S", "%d-%m-%Y %H:%M", "%d-%m-%Y",
+)
+# Crop quality is rated 1–5 on the inspection form
+QUALITY_MIN, QUALITY_MAX = 1, 5
+
+
+_ZERO_WIDTH = re.compile("[\u200b\u200c\u200d\ufeff]")
+_SPACES = re.compile(r"[\s\u00a0]+")
+
+
+def _clean_name(value) -> str:
+    return _SPACES.sub(" ", _ZERO_WIDTH.sub("", unicodedata.normalize("NFC", str(value)))).strip()
+
+
+def normalize_name(values: pd.Series) -> pd.Series:
+    """
+    Names as comparable keys (block, village, …): Unicode NFC, zero-width characters
+    removed, NBSP/whitespace runs → one space, trimmed. Blank → NA.
+    Works on the distinct values only; returns a categorical Series.
+    """
+    codes, uniques = pd.factorize(values)
+    clean = pd.Series([_clean_name(v) or None for v in uniques], dtype=object)
+    # Different raw spellings can collapse to the same name: re-factorize the cleaned values
+    clean_codes, categories = pd.factorize(clean)
+    codes = np.where(codes >= 0, clean_codes[codes.clip(min=0)], -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=categories), index=values.index)
+
+
+def parse_created_at(values: pd.Series) -> pd.Series:
+    """
+    Parse with CREATED_AT_FORMAT; values that do not match it are tried against
+    CREATED_AT_FALLBACK_FORMATS in order (never inferred, so 05/10 stays 5 October).
+    Anything still unparsed is NaT.
+    """
+    parsed = pd.to_datetime(values, format=CREATED_AT_FORMAT, errors="coerce")
+    text = values.astype(str).str.strip()
+    retry = parsed.isna() & values.notna() & (text != "")
+    for fmt in CREATED_AT_FALLBACK_FORMATS:
+        if not retry.any():
+            break
+        parsed[retry] = pd.to_datetime(text[retry], format=fmt, errors="coerce")
+        retry &= parsed.isna()
+    return parsed
+
+
+def apply_schema(df: pd.DataFrame, schema: dict = SHEET_SCHEMA):
+    """
+    Convert the renamed sheet columns to compact types in one pass.
+    Returns (df, report): report holds memory before/after (bytes) and, per
+    column, how many non-empty values could not be converted.
+    """
+    report = {"memory_before": int(df.memory_usage(deep=True).sum()), "invalid": {}}
+    df = df.copy()
+    for col, kind in schema.items():
+        if col not in df:
+            continue
+        values = df[col]
+        blank = values.isna() | (values.astype(str).str.strip() == "")
+        if kind == "datetime":
+            converted = parse_created_at(values)
+        elif kind == "category":
+            converted = normalize_name(values)
+        else:
+            converted = pd.to_numeric(values, errors="coerce")
+            if kind == "quality":
+                # validated rating: anything outside 1–5 is treated as not rated
+                converted = converted.where(converted.between(QUALITY_MIN, QUALITY_MAX)).astype("float32")
+            else:
+                converted = converted.astype(kind)
+        df[col] = converted
+        report["invalid"][col] = int((converted.isna() & ~blank).sum())
+    report["memory_after"] = int(df.memory_usage(deep=True).sum())
+    return df, report
+
+
+# ----------------------------
+# CLEANING
+# ----------------------------
+# Shahjahanpur district with a small margin: (lat_min, lat_max, lon_min, lon_max).
+# Coordinates outside it are treated as bad fixes / typos.
+DISTRICT_BBOX = (27.2, 28.6, 79.2, 80.5)
+# GPS text column → (latitude, longitude) columns it is parsed into (sheet and baseline)
+GPS_COLUMNS = {
+    "gps_inspection": ("latitude", "longitude"),
+    "plot_gps_location": ("plot_latitude", "plot_longitude"),
+}
+_GPS_PATTERN = r"^\(?\s*(?P<lat>[-+]?\d+(?:\.\d+)?)\s*,\s*(?P<lon>[-+]?\d+(?:\.\d+)?)\s*\)?$"
+
+
+def parse_gps_column(df, col, lat_col="latitude", lon_col="longitude", bbox=DISTRICT_BBOX):
+    """
+    Parse GPS column formatted like '27.8921216,79.9309824' (optionally in
+    parentheses) into float lat/lon columns with one Arrow regex pass.
+    Values that do not parse or fall outside `bbox` become NaN.
+    Returns (df, rejected) — rejected counts non-blank values that were dropped.
+    """
+    text = pc.utf8_trim_whitespace(pa.array(df[col].astype("string"), type=pa.string(), from_pandas=True))
+    parts = pc.extract_regex(text, _GPS_PATTERN)
+    lat = pc.cast(pc.struct_field(parts, [0]), pa.float64()).to_numpy(zero_copy_only=False)
+    lon = pc.cast(pc.struct_field(parts, [1]), pa.float64()).to_numpy(zero_copy_only=False)
+    lat_min, lat_max, lon_min, lon_max = bbox
+    with np.errstate(invalid="ignore"):
+        ok = (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+    blank = pc.fill_null(pc.equal(text, ""), True).to_numpy(zero_copy_only=False)
+    df[lat_col] = np.where(ok, lat, np.nan)
+    df[lon_col] = np.where(ok, lon, np.nan)
+    return df, int((~ok & ~blank).sum())
+
+
+def parse_gps_columns(df):
+    """Parse every GPS_COLUMNS column present; returns (df, {column: rejected count})."""
+    rejected = {}
+    for col, (lat_col, lon_col) in GPS_COLUMNS.items():
+        if col in df.columns:
+            df, rejected[col] = parse_gps_column(df, col, lat_col, lon_col)
+    return df, rejected
+
+
+# ==========================================================
+# 🧹 Clean & Deduplicate Google Sheet Data
+# ==========================================================
+
+def remove_duplicates(df_raw):
+    # Ensure datetime (already typed by apply_schema at ingest)
+    if "created_at" in df_raw.columns and not pd.api.types.is_datetime64_any_dtype(df_raw["created_at"]):
+        df_raw["created_at"] = pd.to_datetime(df_raw["created_at"], errors="coerce")
+
+    # Create a date-only column
+    #df_raw["created_date"] = df_raw["created_at"].dt.date
+
+    # Sort so newest submissions appear first
+    df_raw = df_raw.sort_values(by="created_at", ascending=False)
+
+    # Drop duplicate submissions for the same village in the same block on the same day
+    if {"block", "village"} <= set(df_raw.columns):
+        df_raw = df_raw.drop_duplicates(subset=["block", "village", "created_date"], keep="first")
+    else:
+        # fallback if block not present
+        df_raw = df_raw.drop_duplicates(subset=["village", "created_date"], keep="first")
+
+    # Remove helper column
+    #df_raw = df_raw.drop(columns=["created_date"], errors="ignore")
+
+    # Summary info
+    # st.info(f"✅ Cleaned data: {len(df_raw)} unique (latest) submissions per village per day.")
+
+    return df_raw
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Content hash of a frame (values + column names): equal data → equal fingerprint."""
+    h = hashlib.sha1("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    if len(df):
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def clean_inspections(raw: pd.DataFrame):
+    """
+    Full ingest of the raw sheet frame: rename, typed schema, created date/time,
+    GPS parsing, same-day de-duplication and derived metrics.
+    Returns (df, schema_report); `raw` is not modified.
+    """
+    # 🏷️ Rename Google Sheet columns
+    df = raw.rename(columns=lambda c: str(c).strip()).rename(columns=COLUMN_RENAME_MAP)
+
+    # Typed, compact columns (categoricals, exact float64 areas, parsed created_at, validated crop_quality)
+    df, schema_report = apply_schema(df)
+
+    # Extract date/time
+    if "created_at" in df.columns:
+        df["created_date"] = df["created_at"].dt.normalize()
+        df["created_time"] = df["created_at"].dt.time
+
+    # Parse GPS coordinates (inspection point + plot location)
+    df, gps_rejected = parse_gps_columns(df)
+    schema_report["invalid"].update(gps_rejected)
+
+    #remove duplicate entrues fo the same day - village + block filter
+    df = remove_duplicates(df)
+
+    # area_% / quality_% / production_% shared by the Area and Map tabs and exports
+    df = add_derived_metrics(df)
+    return df, schema_report
+
+
+# ----------------------------
+# DATE INDEX (range filtering)
+# ----------------------------
+class DateIndex:
+    """
+    Cleaned frame kept sorted newest-first by a date column, so a date range is a
+    contiguous block found by binary search: O(log n) plus the rows selected,
+    instead of two full boolean masks per rerun. Recent (start, end) views are kept
+    in a small LRU. Views are shared — treat them as read-only (copy before adding columns).
+    """
+
+    def __init__(self, df: pd.DataFrame, col: str = "created_date", max_views: int = 8):
+        self.frame = df.sort_values(col, ascending=False, kind="stable", na_position="last")
+        dates = self.frame[col]
+        n_valid = int(dates.notna().sum())
+        # Negated nanoseconds: ascending keys for searchsorted over the newest-first order
+        self._keys = -dates.iloc[:n_valid].to_numpy(dtype="datetime64[ns]").astype("int64")
+        self.min = dates.iloc[n_valid - 1] if n_valid else pd.NaT
+        self.max = dates.iloc[0] if n_valid else pd.NaT
+        self._views = OrderedDict()
+        self._max_views = max_views
+        self._lock = threading.Lock()
+
+    def between(self, start, end) -> pd.DataFrame:
+        """Rows with start <= date <= end (inclusive, dates normalized to midnight)."""
+        key = (pd.Timestamp(start), pd.Timestamp(end))
+        with self._lock:
+            view = self._views.get(key)
+            if view is not None:
+                self._views.move_to_end(key)
+                return view
+        lo = np.searchsorted(self._keys, -key[1].value, side="left")
+        hi = np.searchsorted(self._keys, -key[0].value, side="right")
+        view = self.frame.iloc[lo:hi]
+        with self._lock:
+            self._views[key] = view
+            while len(self._views) > self._max_views:
+                self._views.popitem(last=False)
+        return view
+
+
+# ----------------------------
+# BASELINE (static reference workbook)
+# ----------------------------
+BASELINE_RENAME_MAP = {
+    "तहसील": "tehsil",
+    "विकास खंड": "block",
+    "गांव": "village",
+    "भूमि गाटा संख्या": "plot_gata_number",
+    "क्षेत्रफल ( हे)": "plot_area",
+    "बुवाई की गई भूमि": "reported_cultivation",
+    "GPS Location": "plot_gps_location",
+}
+
+
+def rename_baseline_columns(df_base: pd.DataFrame) -> pd.DataFrame:
+    if df_base.empty:
+        return df_base
+    df_base.columns = df_base.columns.str.strip()
+    df_base = df_base.rename(columns=BASELINE_RENAME_MAP)
+    return df_base
+
+
+def load_baseline(path: str, cache_dir: str) -> pd.DataFrame:
+    """
+    Read the baseline workbook (renamed columns) through a Parquet copy in
+    cache_dir. The copy is keyed by the xlsx path, mtime and size, so editing
+    or replacing the workbook rebuilds it; otherwise openpyxl is never touched.
+    """
+    info = os.stat(path)
+    path_key = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+    version = hashlib.sha1(f"{info.st_mtime_ns}:{info.st_size}".encode()).hexdigest()[:12]
+    cached = os.path.join(cache_dir, f"baseline_{path_key}_{version}.parquet")
+    if os.path.exists(cached):
+        try:
+            return pd.read_parquet(cached)
+        except Exception:
+            pass  # unreadable copy → rebuild it below
+
+    df_base = rename_baseline_columns(pd.read_excel(path))
+    # Parquet needs one type per column: mixed text/number columns (e.g. gata "261", "696/581/582") become text
+    for col in df_base.columns[df_base.dtypes == object]:
+        df_base[col] = df_base[col].where(df_base[col].isna(), df_base[col].astype(str))
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        for old in glob.glob(os.path.join(cache_dir, f"baseline_{path_key}_*.parquet")):
+            os.remove(old)
+        df_base.to_parquet(f"{cached}.tmp", index=False)
+        os.replace(f"{cached}.tmp", cached)
+    except Exception:
+        pass  # no Parquet engine / read-only disk: still return the parsed workbook
+    return df_base
+
+
+def prepare_baseline(df_base: pd.DataFrame):
+    """
+    Baseline ready for joins: tehsil/block/village normalized like the sheet's
+    (see normalize_name) and plot GPS parsed. Returns (df, {column: rejected GPS count}).
+    """
+    df_base = df_base.copy()
+    for col in ["tehsil", "block", "village"]:
+        if col in df_base.columns:
+            df_base[col] = normalize_name(df_base[col])
+    return parse_gps_columns(df_base)
+
+
+# ----------------------------
+# DERIVED METRICS
+# ----------------------------
+METRIC_COLUMNS = ["plot_area", "area_actual_cultivated", "crop_quality"]
+
+
+def add_derived_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Numeric plot_area / area_actual_cultivated / crop_quality plus the per-row
+    percentages every view shares:
+      area_%       = cultivated / plot area × 100 (clipped to 0–100, NaN if unknown)
+      quality_%    = crop_quality / 5 × 100
+      production_% = area_% × quality_% / 100
+    """
+    df = df.copy()
+    for col in METRIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce") if col in df else np.nan
+    df["area_%"] = (
+        (df["area_actual_cultivated"] / df["plot_area"] * 100).replace([np.inf, -np.inf], np.nan).clip(0, 100)
+    )
+    df["quality_%"] = df["crop_quality"] / QUALITY_MAX * 100
+    df["production_%"] = df["area_%"] * (df["crop_quality"] / QUALITY_MAX)  # = area_% × quality_% / 100
+    return df
+
+
+# ----------------------------
+# ROLLUP CUBE (block × village × day)
+# ----------------------------
+ROLLUP_KEYS = ["block", "village", "created_date"]
+ROLLUP_MEASURES = ["submitted", "inspected", "inspected_count", "plot_area", "area_actual_cultivated", "crop_quality"]
+
+
+def build_rollup(df: pd.DataFrame, keys: list = ROLLUP_KEYS) -> pd.DataFrame:
+    """
+    One row per (block, village, created_date) with additive measures, so any
+    date range's block tables are sums over a slice of this cube:
+      submitted       — inspection rows
+      inspected       — rows with a crop_quality rating
+      inspected_count — inspected rows with a village name (the Area tab's count)
+      plot_area / area_actual_cultivated / crop_quality — sums over inspected rows
+    Rows without a block are left out, like groupby("block") on the raw frame;
+    a sheet without a block column gives an empty cube.
+    """
+    if "block" not in df.columns:
+        return pd.DataFrame(columns=keys + ROLLUP_MEASURES)
+    keys = [k for k in keys if k in df.columns]
+    inspected = df["crop_quality"].notna()
+    named = df["village"].notna() if "village" in df.columns else True
+    measures = pd.DataFrame({
+        "submitted": np.ones(len(df), dtype="int64"),
+        "inspected": inspected.to_numpy(dtype="int64"),
+        "inspected_count": (inspected & named).to_numpy(dtype="int64"),
+        "plot_area": df["plot_area"].astype("float64").where(inspected, 0).fillna(0).to_numpy(),
+        "area_actual_cultivated": df["area_actual_cultivated"].astype("float64").where(inspected, 0).fillna(0).to_numpy(),
+        "crop_quality": df["crop_quality"].astype("float64").fillna(0).to_numpy(),
+    }, index=df.index)
+    measures[keys] = df[keys]
+    return coarsen_rollup(measures[measures["block"].notna()], keys)
+
+
+def coarsen_rollup(cube: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """Re-aggregate a cube (or measure rows) to coarser keys, e.g. block × day."""
+    return cube.groupby(keys, observed=True, dropna=False, sort=False).sum(numeric_only=True).reset_index()
+
+
+def block_summary(cube: pd.DataFrame) -> pd.DataFrame:
+    """
+    Block-level totals from a (sliced) rollup cube: submitted, inspected,
+    inspected_count, total_plot_area, total_cultivated, avg_quality (1–5)
+    and avg_quality_pct (0–100).
+    """
+    agg = cube.groupby("block", observed=True).agg(
+        submitted=("submitted", "sum"),
+        inspected=("inspected", "sum"),
+        inspected_count=("inspected_count", "sum"),
+        total_plot_area=("plot_area", "sum"),
+        total_cultivated=("area_actual_cultivated", "sum"),
+        quality_sum=("crop_quality", "sum"),
+    )
+    agg["avg_quality"] = agg.pop("quality_sum") / agg["inspected"].replace(0, np.nan)
+    agg["avg_quality_pct"] = agg["avg_quality"] / QUALITY_MAX * 100
+    return agg.reset_index()
+
+
+def block_report(blocks: pd.DataFrame, df_base: pd.DataFrame, plots: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    block_summary() joined with the baseline per block: required, submitted,
+    remaining, inspection_% plus cultivated_% / quality_%.
+    With `plots` (PlotJoin.status()), required/remaining count baseline plots and
+    inspection_% is the share of plots with at least one inspection
+    (plots_inspected); without it, remaining is required − submitted rows.
+    """
+    if plots is not None:
+        required = plots.assign(inspected_plot=plots["submitted"] > 0).groupby("block", observed=True).agg(
+            required=("submitted", "size"), plots_inspected=("inspected_plot", "sum")
+        ).reset_index()
+    elif "block" in df_base.columns:
+        required = df_base.groupby("block", observed=True).size().rename("required").reset_index()
+    else:
+        required = pd.DataFrame(columns=["block", "required"])
+    # Categorical blocks with different category sets: join on the names
+    required["block"] = required["block"].astype(object)
+    blocks = blocks.assign(block=blocks["block"].astype(object))
+    report = pd.merge(required, blocks, on="block", how="outer")
+    counts = ["required", "submitted", "inspected", "inspected_count"] + (["plots_inspected"] if plots is not None else [])
+    report[counts] = report[counts].fillna(0).astype(int)
+    done = report["plots_inspected"] if plots is not None else report["submitted"]
+    report["remaining"] = (report["required"] - done).clip(lower=0)
+    report["inspection_%"] = (done / report["required"].replace(0, np.nan) * 100).round(1)
+    report["cultivated_%"] = report["total_cultivated"] / report["total_plot_area"].replace(0, np.nan) * 100
+    report["quality_%"] = report.pop("avg_quality_pct")
+    return report
+
+
+# ----------------------------
+# PLOT JOIN (baseline plot ↔ inspection on block, village, gata number)
+# ----------------------------
+PLOT_KEY = ["block", "village", "plot_gata_number"]
+_DEVANAGARI_DIGITS = str.maketrans("०१२३४५६७८९", "0123456789")
+
+
+_GATA_SEPARATORS = re.compile(r"[,;\\]")
+_GATA_LEADING_ZEROS = re.compile(r"(?<!\d)0+(?=\d)")
+
+
+def _clean_gata(value) -> str:
+    gata = _clean_name(value).translate(_DEVANAGARI_DIGITS).replace(" ", "")
+    gata = _GATA_LEADING_ZEROS.sub("", _GATA_SEPARATORS.sub("/", re.sub(r"\.0+$", "", gata)))
+    return "" if gata in ("0", "-", "nan", "None") else gata
+
+
+def normalize_gata(values: pd.Series) -> pd.Series:
+    """
+    Gata numbers as join keys: Devanagari digits → ASCII, spaces and Excel's
+    trailing ".0" dropped, "," ";" "\\" separators → "/", leading zeros removed
+    per part ("045/2" → "45/2"). Unknown ("", "0", "-") → "".
+    """
+    codes, uniques = pd.factorize(values)
+    clean = np.array([_clean_gata(v) for v in uniques] + [""], dtype=object)
+    return pd.Series(clean[codes], index=values.index)  # code -1 (missing) → the trailing ""
+
+
+def plot_keys(df: pd.DataFrame) -> pd.MultiIndex:
+    """Normalized (block, village, gata) key of every row; missing parts are ""."""
+    parts = []
+    for col in PLOT_KEY:
+        if col not in df.columns:
+            parts.append(np.full(len(df), "", dtype=object))
+        elif col == "plot_gata_number":
+            parts.append(normalize_gata(df[col]).to_numpy())
+        else:
+            parts.append(normalize_name(df[col]).astype(object).fillna("").to_numpy())
+    return pd.MultiIndex.from_arrays(parts, names=PLOT_KEY)
+
+
+class PlotJoin:
+    """
+    Hash-join index from normalized (block, village, gata number) to baseline
+    plots, built once per baseline version. assign() maps inspections to plot
+    positions in one vectorized lookup; an inspection whose key has no plot
+    still counts for its village's plot when that village has exactly one
+    plot in the baseline (gata typed differently or left blank).
+    """
+
+    def __init__(self, df_base: pd.DataFrame):
+        keys = plot_keys(df_base)
+        first = ~keys.duplicated()
+        self.plots = df_base.loc[first, [c for c in df_base.columns if c in PLOT_KEY + ["plot_area", "plot_gps_location"]]]
+        self.plots = self.plots.reset_index(drop=True)
+        # Baseline rows sharing a key are one plot listed several times (kept as baseline_rows)
+        self._index = keys[first]
+        self.plots["baseline_rows"] = np.bincount(self._index.get_indexer(keys), minlength=len(self._index))
+        villages = self._index.droplevel("plot_gata_number")
+        single = ~villages.duplicated(keep=False)
+        self._village_index = villages[single]
+        self._village_plot = np.flatnonzero(single)
+
+    def __len__(self):
+        return len(self.plots)
+
+    def assign(self, df: pd.DataFrame) -> np.ndarray:
+        """Baseline plot position of every inspection row (-1 = no matching plot)."""
+        if not len(self.plots) or not len(df):
+            return np.full(len(df), -1, dtype="int64")
+        keys = plot_keys(df)
+        pos = self._index.get_indexer(keys)
+        miss = np.flatnonzero(pos < 0)
+        if len(miss):
+            village = self._village_index.get_indexer(keys[miss].droplevel("plot_gata_number"))
+            pos[miss] = np.where(village >= 0, self._village_plot[village.clip(min=0)], -1)
+        return pos.astype("int64")
+
+    def status(self, plot_pos: np.ndarray) -> pd.DataFrame:
+        """Per baseline plot: submitted (inspections assigned to it) and status Inspected / Not Inspected."""
+        plots = self.plots.copy()
+        plots["submitted"] = np.bincount(plot_pos[plot_pos >= 0], minlength=len(plots))
+        plots["status"] = np.where(plots["submitted"] > 0, "Inspected", "Not Inspected")
+        return plots
+
+
+# ----------------------------
+# LOCATION CHECK (inspection GPS ↔ baseline plot GPS)
+# ----------------------------
+# An inspection within this distance of a baseline plot counts as "at the plot"
+LOCATION_MATCH_METERS = 250
+# Grid cell sizes of the plot index, fine → coarse. A point is matched against the
+# plots in the 3×3 cells around it; points with none there retry on the next level.
+# The fine cell (~330 m) is just above LOCATION_MATCH_METERS, so every verifiable
+# match is found on the first level; the coarse one reports distances up to ~3 km.
+PLOT_INDEX_CELL_DEGS = (0.003, 0.03)
+EARTH_RADIUS_M = 6_371_000
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres (numpy arrays or scalars)."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+class _PlotGrid:
+    """One grid level: plots sorted by cell key, with each cell's start/count."""
+
+    def __init__(self, lat, lon, rows, cell_deg):
+        self.cell_deg = cell_deg
+        keys = self.keys(lat[rows], lon[rows])
+        order = np.argsort(keys, kind="stable")
+        self.rows = rows[order]
+        self.lat, self.lon = lat[self.rows], lon[self.rows]
+        self.cells, self.starts, self.counts = np.unique(keys[order], return_index=True, return_counts=True)
+
+    def reach_m(self, lat):
+        """Distance around a point that its 3×3 neighbourhood is guaranteed to cover (one cell edge, in metres)."""
+        return np.radians(self.cell_deg) * EARTH_RADIUS_M * np.cos(np.radians(lat))
+
+    def keys(self, lat, lon, dy=0, dx=0):
+        cy = np.floor(lat / self.cell_deg).astype("int64") + dy
+        cx = np.floor(lon / self.cell_deg).astype("int64") + dx
+        return cy * (1 << 32) + (cx + (1 << 31))
+
+    def nearest(self, lat, lon, query, best_row, best_dist):
+        """Update best_row/best_dist for the `query` positions from the 3×3 cells around each point."""
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                keys = self.keys(lat[query], lon[query], dy, dx)
+                pos = np.searchsorted(self.cells, keys).clip(max=len(self.cells) - 1)
+                hit = self.cells[pos] == keys
+                q, pos = query[hit], pos[hit]
+                if not len(q):
+                    continue
+                # Expand every (query, cell) pair into its candidate plots; q is sorted,
+                # so each query's candidates are one contiguous run
+                n = self.counts[pos]
+                run_starts = np.cumsum(n) - n
+                q_rep = np.repeat(q, n)
+                cand = np.repeat(self.starts[pos] - run_starts, n) + np.arange(n.sum())
+                dist = haversine_m(lat[q_rep], lon[q_rep], self.lat[cand], self.lon[cand])
+                run_min = np.minimum.reduceat(dist, run_starts)
+                at_min = np.flatnonzero(dist == np.repeat(run_min, n))
+                pick = at_min[np.unique(q_rep[at_min], return_index=True)[1]]
+                better = run_min < best_dist[q]
+                best_dist[q[better]] = run_min[better]
+                best_row[q[better]] = self.rows[cand[pick[better]]]
+
+
+class PlotIndex:
+    """
+    Grid hash over baseline plot coordinates for bulk nearest-plot lookups.
+    Plots are bucketed by cell once; a query point only scans the plots in its
+    own and the 8 neighbouring cells, so matching n inspections costs about
+    O(n log cells + candidates) instead of n × plots distance pairs.
+    """
+
+    def __init__(self, lat, lon, cell_degs=PLOT_INDEX_CELL_DEGS):
+        lat, lon = np.asarray(lat, dtype="float64"), np.asarray(lon, dtype="float64")
+        rows = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+        self.grids = [_PlotGrid(lat, lon, rows, deg) for deg in cell_degs] if len(rows) else []
+        self.size = len(rows)
+
+    def __len__(self):
+        return self.size
+
+    def nearest(self, lat, lon):
+        """
+        Nearest plot for every query point: (baseline row position or -1, distance in m or NaN).
+        Exact up to the coarsest level's reach (~3 km); points without coordinates, or
+        with no plot in the coarsest neighbourhood, get -1 / NaN.
+        """
+        lat, lon = np.asarray(lat, dtype="float64"), np.asarray(lon, dtype="float64")
+        best_row = np.full(len(lat), -1, dtype="int64")
+        best_dist = np.full(len(lat), np.inf)
+        query = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+        for grid in self.grids:
+            grid.nearest(lat, lon, query, best_row, best_dist)
+            # A match farther than this level's reach may hide a closer plot just outside it
+            query = query[~(best_dist[query] <= grid.reach_m(lat[query]))]
+            if not len(query):
+                break
+        best_dist[best_row < 0] = np.nan
+        return best_row, best_dist
+
+
+def match_to_plots(df: pd.DataFrame, df_base: pd.DataFrame, index: PlotIndex,
+                   max_meters: float = LOCATION_MATCH_METERS) -> pd.DataFrame:
+    """
+    Per inspection (same index as df): the nearest baseline plot's village and
+    gata number, plot_distance_m, and location_verified (within max_meters).
+    """
+    row, dist = index.nearest(df["latitude"], df["longitude"])
+    found = row >= 0
+    out = pd.DataFrame({"nearest_plot": row, "plot_distance_m": dist}, index=df.index)
+    for col in ["village", "plot_gata_number"]:
+        if col in df_base.columns:
+            values = df_base[col].astype(object).to_numpy()
+            out[f"nearest_plot_{col.removeprefix('plot_')}"] = np.where(found, values[row.clip(min=0)], None)
+    out["location_verified"] = out["plot_distance_m"] <= max_meters
+    return out
+
+
+# ----------------------------
+# MAP PREPARATION
+# ----------------------------
+# One entry per map mode: the category column written by classify_map_modes()
+# and the legend (category → marker color) in display order
+MAP_MODES = {
+    "Inspection Status": {
+        "column": "category_status",
+        "colors": {"Not Done": "black", "BDO": "blue", "CVO": "green", "सचिव": "red"},
+    },
+    "Area under Cultivation (%)": {
+        "column": "category_area",
+        "colors": {"< 50%": "red", "50–80%": "blue", "> 80%": "green"},
+    },
+    "Quality of Cultivation (1–5)": {
+        "column": "category_quality",
+        "colors": {"<= 2": "red", "<= 4": "blue", "> 4": "green"},
+    },
+    "Expected Production (%)": {
+        "column": "category_production",
+        "colors": {"< 50%": "red", "< 80%": "blue", "> 80%": "green"},
+    },
+}
+
+
+def classify_designation(designation: pd.Series) -> pd.Series:
+    """Inspecting officer type from the free-text designation: Not Done / BDO / CVO / सचिव / Other."""
+    # Few distinct designations → classify the uniques and broadcast back
+    codes, uniques = pd.factorize(designation, use_na_sentinel=False)
+    d = pd.Series(uniques, dtype=object).astype(str).str.strip().str.upper()
+    label = np.select(
+        [
+            d.eq("") | d.eq("NAN") | d.eq("NONE"),
+            d.str.contains("BDO", regex=False),
+            d.str.contains("CVO", regex=False),
+            d.str.contains("सचिव", regex=False) | d.str.contains("SEC", regex=False),
+        ],
+        ["Not Done", "BDO", "CVO", "सचिव"],
+        default="Other",
+    )
+    return pd.Series(label[codes], index=designation.index)
+
+
+def _bucket(values: pd.Series, conditions: list, labels: list) -> pd.Series:
+    return pd.Series(np.select(conditions, labels[:-1], default=labels[-1]), index=values.index)
+
+
+def classify_map_modes(dfm: pd.DataFrame) -> pd.DataFrame:
+    """Add the category column of every map mode (see MAP_MODES) in one vectorized pass."""
+    area, quality, production = dfm["area_%"], dfm["crop_quality"], dfm["production_%"]
+    designation = dfm["officer_designation"] if "officer_designation" in dfm else pd.Series("", index=dfm.index)
+    dfm["category_status"] = classify_designation(designation)
+    dfm["category_area"] = _bucket(area, [area < 50, area < 80], ["< 50%", "50–80%", "> 80%"])
+    dfm["category_quality"] = _bucket(quality, [quality <= 2, quality <= 4], ["<= 2", "<= 4", "> 4"])
+    dfm["category_production"] = _bucket(production, [production < 50, production < 80], ["< 50%", "< 80%", "> 80%"])
+    return dfm
+
+
+# Hover label: plotly.js formats it in the browser from per-point customdata,
+# so no per-row HTML strings are built on the server
+HOVER_COLUMNS = [
+    "block", "village", "hover_officer", "plot_area", "area_actual_cultivated",
+    "area_%", "crop_quality", "production_%", "hover_date",
+]
+HOVER_TEMPLATE = (
+    "<b>📍 Block:</b> %{customdata[0]}<br><b>Village:</b> %{customdata[1]}%{customdata[2]}"
+    "<br><b>Plot Area:</b> %{customdata[3]:.2f} ha"
+    "<br><b>Area Cultivated:</b> %{customdata[4]:.2f} ha"
+    "<br><b>Area %:</b> %{customdata[5]:.1f}%"
+    "<br><b>Quality:</b> %{customdata[6]:.1f}"
+    "<br><b>Production %:</b> %{customdata[7]:.1f}%"
+    "%{customdata[8]}<extra></extra>"
+)
+
+
+def _format_uniques(values: pd.Series, fmt) -> pd.Series:
+    """Apply a Python formatter to each distinct value only (officers, dates repeat a lot)."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    formatted = np.array([fmt(u) for u in uniques], dtype=object)
+    return pd.Series(formatted[codes], index=values.index)
+
+
+def add_hover_fields(dfm: pd.DataFrame) -> pd.DataFrame:
+    """Optional hover lines (officer, date) used by HOVER_TEMPLATE, "" when missing."""
+    def present(v):
+        return not pd.isna(v) and str(v) != ""
+
+    officer = dfm["officer_name"] if "officer_name" in dfm else pd.Series("", index=dfm.index)
+    designation = dfm["officer_designation"] if "officer_designation" in dfm else pd.Series("", index=dfm.index)
+    officer_key = pd.Series(list(zip(officer, designation)), index=dfm.index)
+    dfm["hover_officer"] = _format_uniques(
+        officer_key,
+        lambda od: f"<br><b>Officer:</b> {od[0]} ({od[1] if present(od[1]) else ''})" if present(od[0]) else "",
+    )
+
+    created = dfm["created_at"] if "created_at" in dfm else pd.Series("", index=dfm.index)
+    if pd.api.types.is_datetime64_any_dtype(created):
+        created = created.dt.normalize()
+    dfm["hover_date"] = _format_uniques(
+        created, lambda d: f"<br><b>Date:</b> {str(d).split(' ')[0]}" if present(d) else ""
+    )
+    return dfm
+
+
+def prepare_map_data(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rows with valid coordinates, hover fields and the category of every map
+    mode — everything the map sub-tab needs, computed column-wise.
+    Expects the add_derived_metrics() columns; missing values are shown as 0.
+    """
+    dfm = df.dropna(subset=["latitude", "longitude"]).copy()
+    metrics = METRIC_COLUMNS + ["area_%", "quality_%", "production_%"]
+    dfm[metrics] = dfm[metrics].fillna(0)
+
+    dfm = add_hover_fields(dfm)
+    return classify_map_modes(dfm)
+
+
+# ----------------------------
+# MAP BINNING (zoom-dependent grid cells)
+# ----------------------------
+# Grid cell ≈ this many screen pixels at the chosen zoom (256 px web-mercator tiles)
+MAP_BIN_PIXELS = 48
+# Detail levels the browser switches between as the map is zoomed: grid cells
+# binned at each of these zooms, then individual markers from MAP_MARKER_ZOOM on
+MAP_LEVEL_ZOOMS = (8, 10, 12)
+MAP_MARKER_ZOOM = 13
+# Marker cap of the top level; above it only the focused rows are markers
+MAP_MAX_MARKERS = 3000
+
+# Cell hover: shared numbers plus the category mix of every mode; each mode's
+# template picks its own mix column (see bin_hover_template)
+BIN_HOVER_COLUMNS = ["count", "area_%", "crop_quality", "production_%"] + [
+    f"{mode['column']}_mix" for mode in MAP_MODES.values()
+]
+
+
+def bin_hover_template(category_col: str) -> str:
+    """Hover template for grid cells in the map mode whose category column is `category_col`."""
+    mix = BIN_HOVER_COLUMNS.index(f"{category_col}_mix")
+    return (
+        "<b>%{customdata[0]} inspections</b>"
+        f"<br>%{{customdata[{mix}]}}"
+        "<br><b>Avg Area %:</b> %{customdata[1]:.1f}%"
+        "<br><b>Avg Quality:</b> %{customdata[2]:.1f}"
+        "<br><b>Avg Production %:</b> %{customdata[3]:.1f}%"
+        "<extra></extra>"
+    )
+
+
+def degrees_per_pixel(zoom: float) -> float:
+    """Longitude degrees covered by one screen pixel at a web-mercator zoom level."""
+    return 360 / (256 * 2 ** zoom)
+
+
+def bin_map_points(dfm: pd.DataFrame, zoom: float, pixels: int = MAP_BIN_PIXELS) -> pd.DataFrame:
+    """
+    Aggregate prepare_map_data() rows into square grid cells sized for `zoom`.
+    One row per non-empty cell: centroid latitude/longitude, count, mean
+    area_% / crop_quality / production_%, a marker_size, and for every map mode
+    the dominant category (same column name as on the points, so the same
+    legend/trace code draws cells) plus "<column>_mix" — the category counts as text.
+    The number of cells depends on the area covered and the zoom, not on the
+    number of inspections.
+    """
+    cell = pixels * degrees_per_pixel(zoom)
+    keys = [
+        pd.Series(np.floor(dfm["latitude"].to_numpy() / cell).astype("int64"), index=dfm.index, name="cell_y"),
+        pd.Series(np.floor(dfm["longitude"].to_numpy() / cell).astype("int64"), index=dfm.index, name="cell_x"),
+    ]
+    cells = dfm.groupby(keys).agg(
+        latitude=("latitude", "mean"),
+        longitude=("longitude", "mean"),
+        count=("latitude", "size"),
+        **{"area_%": ("area_%", "mean"), "crop_quality": ("crop_quality", "mean"), "production_%": ("production_%", "mean")},
+    )
+    for mode in MAP_MODES.values():
+        col = mode["column"]
+        counts = dfm.groupby(keys + [dfm[col]], observed=True).size().unstack(fill_value=0)
+        legend = [c for c in mode["colors"] if c in counts.columns]
+        others = [c for c in counts.columns if c not in mode["colors"]]
+        counts = counts[legend + others].reindex(cells.index, fill_value=0)
+        # Dominant legend category (first in legend order on ties); cells with only
+        # off-legend categories get none and are not drawn, like those points
+        in_legend = counts[legend]
+        cells[col] = in_legend.idxmax(axis=1).where(in_legend.sum(axis=1) > 0) if legend else np.nan
+        cells[f"{col}_mix"] = [
+            " · ".join(f"{name}: {n}" for name, n in zip(counts.columns, row) if n)
+            for row in counts.to_numpy()
+        ]
+    cells["marker_size"] = (14 + 6 * np.log2(cells["count"])).clip(upper=48)
+    return cells.reset_index(drop=True)
+
+
+def map_payload(plot_df: pd.DataFrame, markers: bool) -> dict:
+    """
+    Everything the browser needs to draw any map mode without a rerun: positions,
+    marker sizes, hover customdata, and per mode the legend, each point's
+    category code (index into that legend, -1 = not drawn) and hover template.
+    `plot_df` is prepare_map_data() rows (markers=True) or bin_map_points() cells.
+    """
+    hover_cols = HOVER_COLUMNS if markers else BIN_HOVER_COLUMNS
+    customdata = plot_df[hover_cols].copy()
+    numeric = customdata.select_dtypes("number").columns
+    customdata[numeric] = customdata[numeric].astype("float64").round(4)  # below display precision, smaller JSON
+    customdata = customdata.astype(object)
+    payload = {
+        "lat": plot_df["latitude"].round(6).tolist(),
+        "lon": plot_df["longitude"].round(6).tolist(),
+        "size": 22 if markers else plot_df["marker_size"].round(1).tolist(),
+        "customdata": customdata.where(customdata.notna(), None).to_numpy().tolist(),
+        "modes": {},
+    }
+    for name, mode in MAP_MODES.items():
+        codes = pd.Categorical(plot_df[mode["column"]], categories=list(mode["colors"])).codes
+        payload["modes"][name] = {
+            "legend": list(mode["colors"].items()),
+            "codes": codes.tolist(),
+            "hovertemplate": HOVER_TEMPLATE if markers else bin_hover_template(mode["column"]),
+        }
+    return payload
+
+
+def map_levels(dfm: pd.DataFrame, marker_rows: pd.DataFrame = None) -> list:
+    """
+    All detail levels of the in-browser map, [{"min_zoom", "markers", "layers": [map_payload(), ...]}],
+    so zooming and panning switch levels client-side without a rerun.
+    One grid-cell level per MAP_LEVEL_ZOOMS; from MAP_MARKER_ZOOM on individual
+    markers — every point if there are at most MAP_MAX_MARKERS, otherwise only
+    `marker_rows` (e.g. the focused block, if within the cap), with the remaining
+    points as cells binned at MAP_MARKER_ZOOM. Each level is bounded by the area
+    covered or by MAP_MAX_MARKERS, not by the number of inspections.
+    """
+    levels = [
+        {"min_zoom": zoom, "markers": 0, "layers": [map_payload(bin_map_points(dfm, zoom), markers=False)]}
+        for zoom in MAP_LEVEL_ZOOMS
+    ]
+    if len(dfm) <= MAP_MAX_MARKERS:
+        markers = dfm
+    elif marker_rows is not None and len(marker_rows) <= MAP_MAX_MARKERS:
+        markers = marker_rows
+    else:
+        markers = dfm.iloc[:0]
+    rest = dfm[~dfm.index.isin(markers.index)]
+    layers = []
+    if len(markers):
+        layers.append(map_payload(markers, markers=True))
+    if len(rest):
+        layers.append(map_payload(bin_map_points(rest, MAP_MARKER_ZOOM), markers=False))
+    levels.append({"min_zoom": MAP_MARKER_ZOOM, "markers": len(markers), "layers": layers})
+    return levels
+
+
+# ----------------------------
+# EXCEL EXPORT
+# ----------------------------
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# Sheets longer than this are written with openpyxl's write-only (streaming) workbook
+EXCEL_STREAMING_ROWS = 5_000
+
+
+def to_excel_bytes(df: pd.DataFrame, sheet_name: str, streaming_rows: int = EXCEL_STREAMING_ROWS) -> bytes:
+    """
+    One-sheet .xlsx of `df` (no index). Small frames go through pd.ExcelWriter;
+    large ones are appended row by row to a write-only workbook, which skips
+    openpyxl's in-memory cell model (less memory, ~30% faster).
+    """
+    out = BytesIO()
+    if len(df) <= streaming_rows:
+        with pd.ExcelWriter(out, engine="openpyxl") as w:
+            df.to_excel(w, index=False, sheet_name=sheet_name)
+        return out.getvalue()
+
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    ws.append([str(c) for c in df.columns])
+    values = df.astype(object).where(df.notna(), None)
+    for row in values.itertuples(index=False, name=None):
+        ws.append(row)
+    wb.save(out)
+    return out.getvalue()
+
+
+# ----------------------------
+# COLUMNAR EXPORT (Parquet / Arrow / gzip CSV, Excel for reports)
+# ----------------------------
+# format → (file suffix, MIME type)
+EXPORT_FORMATS = {
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "feather": (".arrow", "application/vnd.apache.arrow.file"),
+    "csv.gz": (".csv.gz", "application/gzip"),
+    "xlsx": (".xlsx", XLSX_MIME),
+}
+
+
+def export_tables(df: pd.DataFrame, df_base: pd.DataFrame) -> dict:
+    """The bulk-export tables: cleaned inspections, baseline join and block aggregates."""
+    tables = {"inspections": df}
+    plots = None
+    if {"village", "block"} <= set(df_base.columns):
+        join = PlotJoin(df_base)
+        plots = tables["plot_status"] = join.status(join.assign(df))
+    tables["block_summary"] = block_report(block_summary(build_rollup(df)), df_base, plots)
+    return tables
+
+
+def _arrow_ready(df: pd.DataFrame) -> pd.DataFrame:
+    """Object columns that mix types (e.g. numbers and "" after a concat) → strings, so Arrow can type them."""
+    df = df.reset_index(drop=True)
+    for col in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[col], skipna=True).startswith("mixed"):
+            df[col] = df[col].astype("string")
+    return df
+
+
+def table_bytes(df: pd.DataFrame, fmt: str, name: str = "data") -> bytes:
+    """Serialize one table as parquet, feather (Arrow IPC), gzip CSV or xlsx (sheet `name`), keeping column types where the format can."""
+    if fmt == "xlsx":
+        return to_excel_bytes(df, name[:31])
+    out = BytesIO()
+    if fmt == "parquet":
+        _arrow_ready(df).to_parquet(out, index=False)
+    elif fmt == "feather":
+        _arrow_ready(df).to_feather(out)
+    elif fmt == "csv.gz":
+        df.to_csv(out, index=False, compression={"method": "gzip", "mtime": 0})
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return out.getvalue()
+
+
+def write_exports(tables: dict, out_dir: str, formats=("parquet",)) -> list:
+    """Write every table in every format to out_dir; returns the written paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for name, frame in tables.items():
+        for fmt in formats:
+            path = os.path.join(out_dir, name + EXPORT_FORMATS[fmt][0])
+            with open(path, "wb") as f:
+                f.write(table_bytes(frame, fmt, name))
+            paths.append(path)
+    return paths
+
+
+# ----------------------------
+# SHEET SYNC (Google Sheet → local snapshot)
+# ----------------------------
+SHEET_SCOPES = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive.readonly"]
+# Incremental sync re-reads this many already-seen rows before the new ones; a
+# difference there (a recent edit or deletion) triggers a full pull
+SHEET_SYNC_OVERLAP_ROWS = 50
+# Edits further back are only visible to a full pull: force one every N incremental syncs
+SHEET_FULL_SYNC_EVERY = 12
+
+
+def sheet_cache_path(sheet_url: str, cache_dir: str) -> str:
+    key = hashlib.sha1(sheet_url.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"sheet_{key}.json")
+
+
+def _pad_row(row: list, width: int) -> list:
+    """Pad/trim a sheet row to exactly `width` cells (the API drops trailing empty cells)."""
+    return (list(row) + [""] * width)[:width]
+
+
+def _trim_row(row: list) -> list:
+    """Row without its trailing empty cells (how the API returns it)."""
+    row = list(row)
+    while row and row[-1] == "":
+        row.pop()
+    return row
+
+
+def _column_letter(n: int) -> str:
+    """1 → A, 27 → AA (A1-notation column)."""
+    letters = ""
+    while n:
+        n, r = divmod(n - 1, 26)
+        letters = chr(65 + r) + letters
+    return letters
+
+
+def read_sheet_snapshot(path: str):
+    """Return the locally stored {"header": [...], "rows": [[...], ...]} or None."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            snap = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(snap.get("header"), list) or not isinstance(snap.get("rows"), list):
+        return None
+    return snap
+
+
+def write_sheet_snapshot(path: str, header: list, rows: list, syncs: int = 0) -> None:
+    """Atomic write; `syncs` counts the incremental syncs since the last full pull."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # unique per writer thread
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"header": header, "rows": rows, "syncs": syncs}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def sync_sheet_rows(ws, cache_path: str, overlap: int = SHEET_SYNC_OVERLAP_ROWS,
+                    full_every: int = SHEET_FULL_SYNC_EVERY):
+    """
+    Incremental sync of a worksheet: returns (header, data_rows).
+
+    The local copy's row count is the watermark. We re-read the last `overlap`
+    seen rows together with everything after them; if those rows still match,
+    only the appended rows are merged in. A changed header (compared in full, so
+    an added column counts) or overlap row falls back to one full get_all_values()
+    pull, as does every `full_every`-th sync — the only way edits further above
+    the watermark are picked up.
+    """
+    snap = read_sheet_snapshot(cache_path)
+    syncs = snap.get("syncs", 0) if snap else 0
+    if snap and snap["header"] and snap["rows"] and syncs + 1 < full_every:
+        header, seen = snap["header"], snap["rows"]
+        width = len(header)
+        if _trim_row(ws.row_values(1)) == _trim_row(header):
+            first = max(len(seen) - overlap, 0)  # index of the first re-read row
+            fetched = [_pad_row(r, width) for r in ws.get_values(f"A{first + 2}:{_column_letter(width)}")]
+            if fetched[:len(seen) - first] == seen[first:]:
+                seen = seen + fetched[len(seen) - first:]
+                write_sheet_snapshot(cache_path, header, seen, syncs + 1)
+                return header, seen
+
+    # Full pull (first run, or local copy no longer matches the sheet)
+    rows = ws.get_all_values()
+    if not rows:
+        return [], []
+    header = rows[0]
+    data = [_pad_row(r, len(header)) for r in rows[1:]]
+    write_sheet_snapshot(cache_path, header, data)
+    return header, data
+
+
+def load_google_sheet(sheet_url: str, creds_json: dict, cache_dir: str, sync_mode: str = "incremental") -> pd.DataFrame:
+    """Raw sheet rows as text; needs gspread and google-auth (imported here so the rest of the module doesn't)."""
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    credentials = Credentials.from_service_account_info(creds_json, scopes=SHEET_SCOPES)
+    ws = gspread.authorize(credentials).open_by_url(sheet_url).get_worksheet(0)
+    if sync_mode == "incremental":
+        header, data = sync_sheet_rows(ws, sheet_cache_path(sheet_url, cache_dir))
+    else:
+        rows = ws.get_all_values()
+        header, data = (rows[0], rows[1:]) if rows else ([], [])
+    if not header:
+        return pd.DataFrame()
+    df = pd.DataFrame(data, columns=header)
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def read_inspections_file(path: str) -> pd.DataFrame:
+    """
+    Raw sheet rows from a local file: the dashboard's sheet snapshot
+    (.dashboard_cache/sheet_*.json), a CSV or an .xlsx download of the sheet.
+    Everything is read as text, like the Sheets API returns it.
+    """
+    if path.endswith(".json"):
+        snap = read_sheet_snapshot(path)
+        if snap is None:
+            raise ValueError(f"Not a sheet snapshot: {path}")
+        return pd.DataFrame(snap["rows"], columns=snap["header"])
+    if path.endswith((".xlsx", ".xls")):
+        return pd.read_excel(path, dtype=str, keep_default_na=False)
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+# ----------------------------
+# BATCH REPORT (headless load → clean → dedup → aggregate)
+# ----------------------------
+# Columns of the map data table (the map sub-tab's data view and the report file)
+MAP_DATA_COLUMNS = [
+    "block", "village", "officer_name", "officer_designation",
+    "plot_area", "area_actual_cultivated", "area_%", "crop_quality",
+    "quality_%", "production_%", "latitude", "longitude",
+]
+
+
+def run_pipeline(raw: pd.DataFrame, df_base: pd.DataFrame, start=None, end=None) -> dict:
+    """
+    Raw sheet rows + prepared baseline → the scheduled report tables, optionally
+    for an inclusive created_date range: block_summary, plot_status (baseline
+    plots with their inspection status) and map_data (one row per located inspection).
+    """
+    df, _ = clean_inspections(raw)
+    if (start is not None or end is not None) and "created_date" in df.columns:
+        df = DateIndex(df).between(start if start is not None else pd.Timestamp.min,
+                                   end if end is not None else pd.Timestamp.max)
+
+    tables = {}
+    plots = None
+    if {"village", "block"} <= set(df_base.columns):
+        join = PlotJoin(df_base)
+        plots = join.status(join.assign(df))
+    tables["block_summary"] = block_report(block_summary(build_rollup(df)), df_base, plots)
+    if plots is not None:
+        tables["plot_status"] = plots
+    if {"latitude", "longitude"} <= set(df.columns):
+        dfm = prepare_map_data(df)
+        tables["map_data"] = dfm[[c for c in MAP_DATA_COLUMNS if c in dfm.columns]]
+    return tables
+
+
+# ----------------------------
+# COMMAND LINE
+# ----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Goshala inspection data pipeline")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="write cleaned inspections, baseline join and block aggregates")
+    export.add_argument("input", help="sheet snapshot .json, .csv or .xlsx")
+    export.add_argument("--baseline", default="baseline_static_data.xlsx", help="baseline workbook")
+    export.add_argument("--out", default="exports", help="output directory")
+    export.add_argument("--format", nargs="+", choices=list(EXPORT_FORMATS), default=["parquet"])
+    export.add_argument("--cache-dir", default=".dashboard_cache", help="baseline Parquet cache directory")
+
+    report = commands.add_parser("report", help="scheduled report: block summary, plot status and map data")
+    source = report.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="sheet snapshot .json, .csv or .xlsx")
+    source.add_argument("--credentials", help="service-account JSON file; pulls the sheet given by --sheet-url")
+    report.add_argument("--sheet-url", help="Google Sheet URL (with --credentials)")
+    report.add_argument("--full-sync", action="store_true", help="re-download the whole sheet instead of only new rows")
+    report.add_argument("--start", type=pd.Timestamp, help="first inspection date, YYYY-MM-DD (inclusive)")
+    report.add_argument("--end", type=pd.Timestamp, help="last inspection date, YYYY-MM-DD (inclusive)")
+    report.add_argument("--baseline", default="baseline_static_data.xlsx", help="baseline workbook")
+    report.add_argument("--out", default="reports", help="output directory")
+    report.add_argument("--format", nargs="+", choices=list(EXPORT_FORMATS), default=["xlsx"])
+    report.add_argument("--cache-dir", default=".dashboard_cache", help="sheet snapshot / baseline Parquet cache directory")
+    args = parser.parse_args(argv)
+
+    if args.command == "report" and args.credentials and not args.sheet_url:
+        parser.error("--credentials needs --sheet-url")
+
+    df_base = pd.DataFrame()
+    if os.path.exists(args.baseline):
+        df_base, _ = prepare_baseline(load_baseline(args.baseline, args.cache_dir))
+
+    if args.command == "export":
+        df, _ = clean_inspections(read_inspections_file(args.input))
+        tables = export_tables(df, df_base)
+    elif args.input:
+        tables = run_pipeline(read_inspections_file(args.input), df_base, args.start, args.end)
+    else:
+        with open(args.credentials, encoding="utf-8") as f:
+            creds_json = json.load(f)
+        raw = load_google_sheet(args.sheet_url, creds_json, args.cache_dir,
+                                "full" if args.full_sync else "incremental")
+        tables = run_pipeline(raw, df_base, args.start, args.end)
+
+    for path in write_exports(tables, args.out, args.format):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+⏱️ Startup profiling for the dashboard — standard library only, so it can be
+imported first and time everything after it.
+
+Streamlit re-executes the script on every rerun, but imported modules stay in
+sys.modules; the numbers kept here therefore describe the process: how long each
+heavy import took when it was first needed, and how long the first (cold)
+script run took to reach its checkpoints.
+"""
+
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# module → seconds of its first (uncached) import in this process, in import order
+IMPORT_TIMES = {}
+_lock = threading.Lock()
+_cold_run = None
+
+
+@contextmanager
+def timed_import(name: str):
+    """
+    `with timed_import("plotly.express"): import plotly.express as px`
+
+    Records how long the import inside the block took, the first time `name` is
+    loaded in this process; already-imported modules are not recorded.
+    """
+    cold = name not in sys.modules
+    t0 = time.perf_counter()
+    yield
+    if cold:
+        with _lock:
+            IMPORT_TIMES.setdefault(name, time.perf_counter() - t0)
+
+
+class RunTimer:
+    """Checkpoints of one script run (seconds since it started); the process's first run is kept as the cold start."""
+
+    def __init__(self):
+        global _cold_run
+        self.t0 = time.perf_counter()
+        self.marks = {}
+        with _lock:
+            if _cold_run is None:
+                _cold_run = self
+
+    def mark(self, label: str) -> float:
+        """Record `label` once per run; returns its time."""
+        return self.marks.setdefault(label, time.perf_counter() - self.t0)
+
+    @property
+    def is_cold(self) -> bool:
+        return _cold_run is self
+
+
+def cold_run():
+    """The first RunTimer created in this process (None before the first run)."""
+    return _cold_run
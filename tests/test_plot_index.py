@@ -0,0 +1,70 @@
+"""PlotIndex nearest-plot lookups against brute-force haversine."""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from charagah_pipeline import PLOT_INDEX_CELL_DEGS, PlotIndex, haversine_m  # noqa: E402
+
+
+def brute_force(plot_lat, plot_lon, lat, lon):
+    """(nearest finite plot row, distance) per query; -1 / inf when the query has no coordinates."""
+    dist = haversine_m(lat[:, None], lon[:, None], plot_lat[None, :], plot_lon[None, :])
+    dist = np.where(np.isfinite(dist), dist, np.inf)
+    row = dist.argmin(axis=1)
+    best = dist[np.arange(len(lat)), row]
+    return np.where(np.isfinite(best), row, -1), best
+
+
+def coarse_reach_m(lat):
+    return np.radians(PLOT_INDEX_CELL_DEGS[-1]) * 6_371_000 * np.cos(np.radians(lat))
+
+
+def test_matches_brute_force_on_random_points():
+    rng = np.random.default_rng(7)
+    plot_lat = rng.uniform(27.5, 28.3, 3000)
+    plot_lon = rng.uniform(79.5, 80.2, 3000)
+    plot_lat[rng.random(3000) < 0.05] = np.nan  # baseline plots without a GPS fix
+    # Queries around and beyond the plots, some without coordinates
+    lat = rng.uniform(27.3, 28.5, 5000)
+    lon = rng.uniform(79.3, 80.4, 5000)
+    lat[rng.random(5000) < 0.02] = np.nan
+
+    row, dist = PlotIndex(plot_lat, plot_lon).nearest(lat, lon)
+    want_row, want_dist = brute_force(plot_lat, plot_lon, lat, lon)
+
+    assert (row[np.isnan(lat)] == -1).all() and np.isnan(dist[np.isnan(lat)]).all()
+    found = row >= 0
+    assert np.isfinite(plot_lat[row[found]]).all()
+    # Every reported distance is the real distance to the reported plot, never below the true nearest
+    np.testing.assert_allclose(dist[found], haversine_m(lat[found], lon[found], plot_lat[row[found]], plot_lon[row[found]]))
+    assert (dist[found] >= want_dist[found] - 1e-6).all()
+    # Within the coarse reach the answer is exact
+    near = want_dist <= coarse_reach_m(np.nan_to_num(lat))
+    assert near.sum() > 2000 and (~near & (row < 0) & np.isfinite(lat)).any()
+    np.testing.assert_allclose(dist[near], want_dist[near])
+
+
+def test_point_with_no_plot_within_coarse_reach():
+    plot_lat, plot_lon = np.array([27.8, 27.801]), np.array([79.9, 79.9])
+    row, dist = PlotIndex(plot_lat, plot_lon).nearest(np.array([28.8, 27.8001]), np.array([79.9, 79.9]))
+    assert row.tolist() == [-1, 0]
+    assert np.isnan(dist[0]) and dist[1] < 20
+
+
+def test_ties_pick_one_of_the_closest_plots():
+    # Two plots at the same spot and two mirrored around the query, across cell borders
+    plot_lat = np.array([27.9, 27.9, 27.9 + 0.0031, 27.9 - 0.0031, 28.0])
+    plot_lon = np.array([79.8, 79.8, 79.95, 79.95, 80.0])
+    row, dist = PlotIndex(plot_lat, plot_lon).nearest(np.array([27.9, 27.9]), np.array([79.8, 79.95]))
+    assert row[0] in (0, 1) and dist[0] == 0
+    assert row[1] in (2, 3)
+    np.testing.assert_allclose(dist[1], haversine_m(27.9, 79.95, 27.9031, 79.95))
+
+
+def test_all_plots_without_coordinates():
+    index = PlotIndex(np.array([np.nan, np.nan]), np.array([79.9, np.nan]))
+    row, dist = index.nearest(np.array([27.8]), np.array([79.9]))
+    assert len(index) == 0 and row.tolist() == [-1] and np.isnan(dist).all()
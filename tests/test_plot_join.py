@@ -0,0 +1,92 @@
+"""Gata number normalization and the baseline plot join."""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from charagah_pipeline import PlotJoin, normalize_gata  # noqa: E402
+
+
+@pytest.mark.parametrize("raw, key", [
+    ("45", "45"),
+    (45.0, "45"),
+    ("45.0", "45"),
+    ("४५", "45"),
+    ("४५/२", "45/2"),
+    ("045/02", "45/2"),
+    ("10/20", "10/20"),
+    ("100", "100"),
+    ("45, 46", "45/46"),
+    ("45;46", "45/46"),
+    ("45\\46", "45/46"),
+    (" 4 5 ", "45"),
+    ("\u00a045\u200b", "45"),
+    ("12क", "12क"),
+    ("0", ""),
+    ("-", ""),
+    ("", ""),
+    (None, ""),
+    (np.nan, ""),
+])
+def test_normalize_gata(raw, key):
+    assert normalize_gata(pd.Series([raw], dtype=object)).tolist() == [key]
+
+
+def test_normalize_gata_keeps_index_and_repeats():
+    values = pd.Series(["४५", None, "45.0", "045"], index=[10, 11, 12, 13], dtype=object)
+    out = normalize_gata(values)
+    assert out.index.tolist() == [10, 11, 12, 13]
+    assert out.tolist() == ["45", "", "45", "45"]
+
+
+BASE = pd.DataFrame({
+    "block": ["कांट", "कांट", "कांट", "कांट", "बण्डा"],
+    "village": ["कुदैया", "कुदैया", "कुदैया", "तौनी", "तौनी"],
+    "plot_gata_number": ["45", "045", "46/2", "12", "12"],
+    "plot_area": [1.0, 1.0, 0.5, 2.0, 3.0],
+})
+
+
+def test_duplicate_baseline_keys_fold_into_one_plot():
+    join = PlotJoin(BASE)
+    assert len(join) == 4
+    assert join.plots["plot_gata_number"].tolist() == ["45", "46/2", "12", "12"]
+    assert join.plots["baseline_rows"].tolist() == [2, 1, 1, 1]
+
+
+@pytest.mark.parametrize("block, village, gata, plot", [
+    ("कांट", "कुदैया", "४५", 0),  # Devanagari digits
+    ("कांट", "कुदैया", "46, 2", 1),  # separator
+    ("कांट", "\u00a0कुदैया", "46/02", 1),  # NBSP-padded village, leading zero
+    ("कांट", "कुदैया", "99", -1),  # no such gata, village has several plots
+    ("कांट", "तौनी", "99", 2),  # single-plot village: gata typed differently
+    ("कांट", "तौनी", "", 2),  # … or left blank
+    ("बण्डा", "तौनी", "12", 3),  # same village name in another block
+    ("खुटार", "तौनी", "12", -1),  # unknown block
+])
+def test_assign(block, village, gata, plot):
+    df = pd.DataFrame({"block": [block], "village": [village], "plot_gata_number": [gata]})
+    assert PlotJoin(BASE).assign(df).tolist() == [plot]
+
+
+def test_status_counts_submissions_per_plot():
+    join = PlotJoin(BASE)
+    df = pd.DataFrame({
+        "block": ["कांट", "कांट", "कांट", "कांट"],
+        "village": ["कुदैया", "कुदैया", "तौनी", "कुदैया"],
+        "plot_gata_number": ["45", "045", "7", "99"],
+    })
+    plots = join.status(join.assign(df))
+    assert plots["submitted"].tolist() == [2, 0, 1, 0]
+    assert plots["status"].tolist() == ["Inspected", "Not Inspected", "Inspected", "Not Inspected"]
+
+
+def test_assign_without_baseline_or_rows():
+    empty = PlotJoin(BASE.iloc[:0])
+    df = pd.DataFrame({"block": ["कांट"], "village": ["तौनी"], "plot_gata_number": ["12"]})
+    assert empty.assign(df).tolist() == [-1]
+    assert PlotJoin(BASE).assign(df.iloc[:0]).tolist() == []
@@ -0,0 +1,33 @@
+"""Rollup cube / block report on sheets with and without a block column."""
+
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from charagah_pipeline import block_report, block_summary, build_rollup, clean_inspections, run_pipeline  # noqa: E402
+
+RAW = pd.DataFrame({
+    "Created At": ["2025-10-01 10:00:00", "2025-10-02 11:00:00"],
+    "विकास खंड": ["कांट", "बण्डा"],
+    "गांव": ["कुदैया", "तौनी"],
+    "क्षेत्रफल ( हे)": ["1.0", "2.0"],
+    "कुल बुवाई पाई गई क्षेत्रफल( हे में)": ["0.5", "2.0"],
+    "फसल की गुणवत्ता": ["4", "5"],
+})
+
+
+def test_block_summary_from_rollup():
+    df, _ = clean_inspections(RAW)
+    blocks = block_summary(build_rollup(df)).set_index("block")
+    assert blocks.loc["कांट", "submitted"] == 1
+    assert blocks.loc["बण्डा", "total_cultivated"] == 2.0
+
+
+def test_sheet_without_block_column_gives_empty_aggregates():
+    df, _ = clean_inspections(RAW.drop(columns=["विकास खंड"]))
+    cube = build_rollup(df)
+    assert cube.empty
+    assert block_report(block_summary(cube), pd.DataFrame()).empty
+    assert run_pipeline(RAW.drop(columns=["विकास खंड"]), pd.DataFrame())["block_summary"].empty
@@ -0,0 +1,41 @@
+"""Typed sheet columns: Created At layouts and the invalid-value report."""
+
+import os
+import sys
+from io import BytesIO
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from charagah_pipeline import apply_schema, block_summary, build_rollup, clean_inspections, parse_created_at, to_excel_bytes  # noqa: E402
+
+
+def test_created_at_day_first_layouts_are_not_swapped():
+    values = pd.Series(["2025-10-05 10:00:00", "05/10/2025 10:00", "25/10/2025 10:00", "05-10-2025", "5/10/2025 9:30:15"])
+    parsed = parse_created_at(values)
+    assert parsed.tolist() == [
+        pd.Timestamp("2025-10-05 10:00"), pd.Timestamp("2025-10-05 10:00"), pd.Timestamp("2025-10-25 10:00"),
+        pd.Timestamp("2025-10-05"), pd.Timestamp("2025-10-05 09:30:15"),
+    ]
+
+
+def test_unparsed_created_at_is_counted_invalid():
+    raw = pd.DataFrame({"created_at": ["05/10/2025 10:00", "10/5/25 at noon", "", None]})
+    df, report = apply_schema(raw)
+    assert df["created_at"].isna().tolist() == [False, True, True, True]
+    assert report["invalid"]["created_at"] == 1
+
+
+def test_areas_are_exported_as_typed():
+    raw = pd.DataFrame({
+        "Created At": ["2025-10-01 10:00:00", "2025-10-01 11:00:00"],
+        "विकास खंड": ["कांट", "कांट"],
+        "गांव": ["कुदैया", "तौनी"],
+        "क्षेत्रफल ( हे)": ["0.399", "1.2"],
+        "कुल बुवाई पाई गई क्षेत्रफल( हे में)": ["0.399", "1.2"],
+        "फसल की गुणवत्ता": ["4", "5"],
+    })
+    df, _ = clean_inspections(raw)
+    back = pd.read_excel(BytesIO(to_excel_bytes(df[["plot_area"]], "Data")))
+    assert sorted(back["plot_area"]) == [0.399, 1.2]
+    assert block_summary(build_rollup(df))["total_plot_area"].tolist() == [0.399 + 1.2]